@@ -3,28 +3,57 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
 from contextlib import asynccontextmanager
 from coffeeapp.core.config import settings
-from coffeeapp.core.scheduler import setup_scheduler
+from coffeeapp.core.ids import worker_ids
+from coffeeapp.core.invalidation import cache_invalidation
+from coffeeapp.core.menu_cache import menu_version
+from coffeeapp.core.scheduler import scheduler_service
 from coffeeapp.api.v1.endpoints import users, auth, products, categories, cart, orders, chat
-from coffeeapp.api.v1.endpoints.chat import router as chat_router
-from coffeeapp.core.security import SecurityMiddleware, SQLInjectionMiddleware
+from coffeeapp.api.v1.endpoints.chat import router as chat_router, manager as chat_manager
+from coffeeapp.core.order_queue import order_queue
+from coffeeapp.core.responses import FastJSONResponse
+from coffeeapp.core.security import SecurityMiddleware, password_hasher
+from coffeeapp.core.task_queue import task_workers
+from coffeeapp.tasks import audit, notifications  # noqa: F401 - регистрация задач
 from starlette_csrf import CSRFMiddleware
 from starlette.middleware.trustedhost import TrustedHostMiddleware
+from coffeeapp.db.chat_history import chat_history
 from coffeeapp.db.init_db import init_db
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Инициализация БД при запуске
-    init_db()
-    # Настройка планировщика при запуске
-    scheduler = setup_scheduler()
-    scheduler.start()
+    await init_db()
+    # Версия меню для ETag и Last-Modified - общая для всех воркеров
+    await menu_version.start()
+    # Уникальный номер воркера для id сообщений чата
+    await worker_ids.start()
+    await chat_history.start()
+    await chat_manager.start()
+    # Сброс кэшей меню и пользователей, сделанный другими воркерами
+    await cache_invalidation.start()
+    # Очередь открытых заказов загружается целиком после подписки на брокер,
+    # чтобы события других воркеров во время загрузки не терялись
+    await order_queue.rebuild()
+    # Планировщик запускается только в воркере, получившем аренду лидерства
+    await scheduler_service.start()
+    # Воркеры фоновых задач
+    await task_workers.start()
     yield
     # Очистка ресурсов при выключении
-    # Здесь можно добавить cleanup код
+    await scheduler_service.stop()
+    await task_workers.stop()
+    await chat_manager.close()
+    await cache_invalidation.close()
+    await menu_version.stop()
+    # Сбрасываем в БД накопленную историю чата
+    await chat_history.close()
+    await worker_ids.stop()
+    password_hasher.shutdown()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
+    default_response_class=FastJSONResponse,
     lifespan=lifespan
 )
 
@@ -38,9 +67,8 @@ app.add_middleware(
     expose_headers=["*"]
 )
 
-# Добавляем middleware безопасности
+# Добавляем middleware безопасности (заголовки и проверка на SQL-инъекции)
 app.add_middleware(SecurityMiddleware)
-app.add_middleware(SQLInjectionMiddleware)
 app.add_middleware(
     TrustedHostMiddleware, 
     allowed_hosts=["*"]  
@@ -0,0 +1,115 @@
+"""
+Задержка рассылки по комнате (user-016) с --connections имитированными
+WebSocket-соединениями, часть из которых медленные (--slow). Сравнивается
+последовательный await send по всем сокетам (прежний broadcast) и рассылка
+ConnectionManager через брокер в очереди соединений.
+
+    python -m benchmarks.broadcast --connections 10000 --slow 100
+"""
+import argparse
+import asyncio
+import time
+from typing import List
+from benchmarks.common import percentile
+
+ROOM = "bench"
+
+class User:
+    def __init__(self, user_id: int):
+        self.id = user_id
+        self.username = f"user{user_id}"
+        self.role = "user"
+
+class SimulatedWebSocket:
+    """Быстрый сокет отмечает время получения; медленный отвечает через delay секунд"""
+
+    def __init__(self, delivery: "Delivery", delay: float = 0.0):
+        self.delivery = delivery
+        self.delay = delay
+
+    async def send(self, message):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        else:
+            self.delivery.received()
+
+    async def send_text(self, text: str):
+        await self.send({"type": "websocket.send", "text": text})
+
+    async def close(self, code: int = 1000):
+        pass
+
+class Delivery:
+    """Время доставки одного сообщения всем быстрым сокетам"""
+
+    def __init__(self, expected: int):
+        self.expected = expected
+        self.latencies: List[float] = []
+        self.started = 0.0
+        self.done = asyncio.Event()
+
+    def start(self):
+        self.latencies.clear()
+        self.done.clear()
+        self.started = time.perf_counter()
+
+    def received(self):
+        self.latencies.append(time.perf_counter() - self.started)
+        if len(self.latencies) == self.expected:
+            self.done.set()
+
+def print_report(label: str, fanout: List[float], latencies: List[float]):
+    print(
+        f"{label:18}: fan-out p50={percentile(fanout, 50) * 1000:.1f} ms "
+        f"p99={percentile(fanout, 99) * 1000:.1f} ms; "
+        f"per connection p50={percentile(latencies, 50) * 1000:.1f} ms "
+        f"p99={percentile(latencies, 99) * 1000:.1f} ms"
+    )
+
+async def main(connections: int, slow: int, messages: int, slow_delay: float):
+    from coffeeapp.api.v1.endpoints.chat import ConnectionManager
+    from coffeeapp.core.broker import MemoryBroker
+
+    delivery = Delivery(connections - slow)
+    # Медленные сокеты равномерно распределены среди быстрых
+    step = connections // slow if slow else connections + 1
+    sockets = [
+        SimulatedWebSocket(delivery, slow_delay if slow and index % step == 0 and index // step < slow else 0.0)
+        for index in range(connections)
+    ]
+    text = '{"type": "message", "room": "bench", "message": "' + "x" * 100 + '"}'
+
+    fanout: List[float] = []
+    latencies: List[float] = []
+    for _ in range(messages):
+        delivery.start()
+        for websocket in sockets:
+            await websocket.send_text(text)
+        await delivery.done.wait()
+        fanout.append(time.perf_counter() - delivery.started)
+        latencies.extend(delivery.latencies)
+    print_report("sequential send", fanout, latencies)
+
+    manager = ConnectionManager(MemoryBroker())
+    for index, websocket in enumerate(sockets):
+        await manager.register(websocket, User(index), [ROOM])
+    fanout.clear()
+    latencies.clear()
+    for _ in range(messages):
+        delivery.start()
+        await manager.broadcast(text, ROOM)
+        await delivery.done.wait()
+        fanout.append(time.perf_counter() - delivery.started)
+        latencies.extend(delivery.latencies)
+    print_report("queued broadcast", fanout, latencies)
+    print(f"connected after run: {len(manager.active_connections)} of {connections}")
+    await manager.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--connections", type=int, default=10_000)
+    parser.add_argument("--slow", type=int, default=100)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--slow-delay", type=float, default=0.01, help="секунд на одну отправку медленному клиенту")
+    args = parser.parse_args()
+    asyncio.run(main(args.connections, args.slow, args.messages, args.slow_delay))
@@ -0,0 +1,87 @@
+"""
+Пропускная способность оформления заказа (user-011) для корзин из 1, 10 и 50
+товаров: POST /api/v1/orders/ через приложение в процессе, по одному
+пользователю на заказ. Корзины наполняются заранее и в замер не входят.
+
+    python -m benchmarks.checkout --checkouts 200 --concurrency 10
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from typing import List
+from benchmarks.common import init_database, report
+
+async def main(checkouts: int, concurrency: int):
+    await init_database()
+    import httpx
+    from sqlalchemy import event, insert, select
+    from app import app
+    from coffeeapp.core.security import create_access_token
+    from coffeeapp.db.session import SessionLocal, engine
+    from coffeeapp.models.category import Category
+    from coffeeapp.models.product import Product
+    from coffeeapp.models.user import User
+
+    async with SessionLocal() as db:
+        category_id = (await db.execute(
+            insert(Category).values(name="Bench").returning(Category.id)
+        )).scalar_one()
+        product_ids = (await db.scalars(insert(Product).returning(Product.id), [
+            {"name": f"Product {i}", "price": 1 + i % 10, "category_id": category_id}
+            for i in range(50)
+        ])).all()
+        await db.commit()
+
+    statements = 0
+
+    def count(*args):
+        nonlocal statements
+        statements += 1
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test/api/v1", timeout=60) as client:
+        for size in (1, 10, 50):
+            emails = [f"{uuid.uuid4().hex[:12]}@example.com" for _ in range(checkouts)]
+            async with SessionLocal() as db:
+                await db.execute(insert(User), [
+                    {"email": email, "username": email.split("@")[0], "hashed_password": "-", "is_verified": True}
+                    for email in emails
+                ])
+                await db.commit()
+            headers = [{"Authorization": f"Bearer {create_access_token({'sub': email})}"} for email in emails]
+            operations = [{"operation": "set", "product_id": product_id, "quantity": 2} for product_id in product_ids[:size]]
+            for user_headers in headers:
+                response = await client.post("/cart/batch", json=operations, headers=user_headers)
+                response.raise_for_status()
+
+            samples: List[float] = []
+            limiter = asyncio.Semaphore(concurrency)
+
+            async def checkout(user_headers: dict):
+                async with limiter:
+                    started = time.perf_counter()
+                    response = await client.post("/orders/", headers=user_headers)
+                    samples.append(time.perf_counter() - started)
+                    response.raise_for_status()
+                    assert len(response.json()["items"]) == size
+
+            statements = 0
+            event.listen(engine.sync_engine, "before_cursor_execute", count)
+            started = time.perf_counter()
+            await asyncio.gather(*(checkout(user_headers) for user_headers in headers))
+            elapsed = time.perf_counter() - started
+            event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+            print(
+                f"{size:2} items: {checkouts / elapsed:6.0f} checkouts/s, "
+                f"{statements / checkouts:.1f} SQL statements per checkout"
+            )
+            report(f"{size:2} items latency", samples)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--checkouts", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.checkouts, args.concurrency))
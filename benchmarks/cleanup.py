@@ -0,0 +1,52 @@
+"""
+Очистка неверифицированных пользователей на большом объеме (user-021).
+Заполняет таблицу просроченными пользователями одним INSERT ... SELECT,
+запускает cleanup_unverified_users и параллельно измеряет задержки event loop.
+
+    python -m benchmarks.cleanup --rows 1000000
+"""
+import argparse
+import asyncio
+import time
+from benchmarks.common import init_database
+
+async def main(rows: int, batch_size: int):
+    await init_database()
+    from coffeeapp.db.session import engine
+    from coffeeapp.tasks.cleanup import cleanup_unverified_users
+
+    async with engine.begin() as conn:
+        await conn.exec_driver_sql(
+            "WITH RECURSIVE s(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM s WHERE i < %d) "
+            "INSERT INTO users (email, username, hashed_password, is_active, is_verified, "
+            "verification_expires, role) "
+            "SELECT 'bench' || i || '@example.com', 'bench' || i, '-', true, false, "
+            "'2000-01-01', 'user' FROM s" % rows
+        )
+
+    # Задержка цикла событий: насколько позже запланированного просыпается sleep(10 мс)
+    lags = []
+    running = True
+
+    async def probe():
+        while running:
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lags.append(time.perf_counter() - started - 0.01)
+
+    probing = asyncio.create_task(probe())
+    started = time.perf_counter()
+    metrics = await cleanup_unverified_users(batch_size)
+    elapsed = time.perf_counter() - started
+    running = False
+    await probing
+
+    print(f"deleted {metrics['deleted']} of {rows} rows in {elapsed:.2f} s, {metrics['batches']} batches")
+    print(f"event loop lag: max {max(lags) * 1000:.1f} ms, stalls over 20 ms: {sum(lag > 0.02 for lag in lags)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.batch_size))
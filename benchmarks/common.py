@@ -0,0 +1,37 @@
+"""
+Общая подготовка бенчмарков. Импортируется до модулей приложения:
+по умолчанию каждый запуск работает с новой временной SQLite,
+для PostgreSQL задайте DATABASE_URL.
+"""
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import List, Sequence
+
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench.db")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+def percentile(samples: Sequence[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+def report(label: str, samples: Sequence[float]) -> None:
+    """Сводка задержек в миллисекундах"""
+    ms = [sample * 1000 for sample in samples]
+    print(
+        f"{label}: n={len(ms)} p50={percentile(ms, 50):.2f} ms "
+        f"p99={percentile(ms, 99):.2f} ms max={max(ms):.2f} ms"
+    )
+
+@contextmanager
+def timer(samples: List[float]):
+    started = time.perf_counter()
+    yield
+    samples.append(time.perf_counter() - started)
+
+async def init_database():
+    """Схема через миграции и регистрация всех моделей, как при запуске приложения"""
+    import app  # noqa: F401 - регистрация моделей
+    from coffeeapp.db.init_db import init_db
+    await init_db()
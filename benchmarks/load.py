@@ -0,0 +1,110 @@
+"""
+Нагрузочный тест (user-001): задержки p50/p99 под параллельными клиентами httpx.
+Каждый клиент по кругу запрашивает /auth/me (get_current_user с запросом к БД),
+поиск продуктов и /health. Данные создаются через API под админом из init_db,
+поэтому скрипт работает с любой ревизией приложения.
+
+    python -m benchmarks.load                                # приложение в процессе
+    python -m benchmarks.load --url http://127.0.0.1:8000    # запущенный сервер
+
+До/после: запустите uvicorn на базовой ревизии и на текущей
+(каждую со своей новой БД) и прогоните скрипт с --url против обеих.
+"""
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+from benchmarks.common import init_database, report, timer
+
+API = "/api/v1"
+WORDS = ["latte", "mocha", "espresso", "americano", "cappuccino", "raf", "flat", "cortado"]
+
+async def login(client, email: str, password: str) -> dict:
+    response = await client.post(
+        f"{API}/auth/authentication",
+        data={"username": email, "password": password}
+    )
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+async def seed(client, headers: dict, products: int):
+    response = await client.post(
+        f"{API}/categories/category", json={"name": f"Load {time.time_ns()}"}, headers=headers
+    )
+    response.raise_for_status()
+    category_id = response.json()["id"]
+
+    async def create(index: int):
+        response = await client.post(f"{API}/products/product", json={
+            "name": f"{WORDS[index % len(WORDS)]} {index}",
+            "description": "load test",
+            "price": 1 + index % 10,
+            "category_id": category_id
+        }, headers=headers)
+        response.raise_for_status()
+
+    for start in range(0, products, 50):
+        await asyncio.gather(*(create(index) for index in range(start, min(start + 50, products))))
+
+async def run(client, clients: int, requests: int, headers: dict, verbose: bool = True):
+    samples: Dict[str, List[float]] = {"auth/me": [], "products search": [], "health": []}
+
+    async def worker(number: int):
+        for index in range(requests):
+            kind = (number + index) % 3
+            if kind == 0:
+                with timer(samples["auth/me"]):
+                    response = await client.post(f"{API}/auth/me", headers=headers)
+            elif kind == 1:
+                word = WORDS[(number * 7 + index) % len(WORDS)]
+                with timer(samples["products search"]):
+                    response = await client.get(
+                        f"{API}/products/products", params={"search": word, "limit": 20, "skip": index % 50}
+                    )
+            else:
+                with timer(samples["health"]):
+                    response = await client.get("/health")
+            response.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(number) for number in range(clients)))
+    elapsed = time.perf_counter() - started
+    if not verbose:
+        return
+
+    total = sum(len(values) for values in samples.values())
+    print(f"{clients} clients, {total} requests in {elapsed:.2f} s ({total / elapsed:.0f} req/s)")
+    for label, values in samples.items():
+        report(f"  {label:16}", values)
+    report("  all             ", [value for values in samples.values() for value in values])
+
+async def main(url: str, clients: int, requests: int, products: int, email: str, password: str):
+    import httpx
+
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    if url:
+        client = httpx.AsyncClient(base_url=url, limits=limits, timeout=60)
+    else:
+        await init_database()
+        from app import app
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test", limits=limits, timeout=60
+        )
+
+    async with client:
+        headers = await login(client, email, password)
+        await seed(client, headers, products)
+        # Прогрев: соединения пула, кэши
+        await run(client, clients, 3, headers, verbose=False)
+        await run(client, clients, requests, headers)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="", help="адрес запущенного сервера; по умолчанию приложение в процессе")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=60, help="запросов на клиента")
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--email", default="admin@example.com")
+    parser.add_argument("--password", default="admin123")
+    args = parser.parse_args()
+    asyncio.run(main(args.url, args.clients, args.requests, args.products, args.email, args.password))
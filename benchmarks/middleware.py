@@ -0,0 +1,65 @@
+"""
+Накладные расходы middleware (user-005): запросов в секунду на /health
+через полный стек приложения и через голое FastAPI-приложение с тем же
+обработчиком. Запросы подаются прямо в ASGI, без сети и HTTP-клиента.
+
+    python -m benchmarks.middleware --requests 20000
+"""
+import argparse
+import asyncio
+import time
+import benchmarks.common  # noqa: F401 - временная БД вместо настроек по умолчанию
+
+SCOPE = {
+    "type": "http",
+    "asgi": {"version": "3.0"},
+    "http_version": "1.1",
+    "method": "GET",
+    "scheme": "http",
+    "path": "/health",
+    "raw_path": b"/health",
+    "root_path": "",
+    "query_string": b"",
+    "headers": [(b"host", b"localhost"), (b"user-agent", b"bench"), (b"accept", b"*/*")],
+    "client": ("127.0.0.1", 50000),
+    "server": ("127.0.0.1", 8000),
+}
+
+async def call(app) -> int:
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(dict(SCOPE), receive, send)
+    return status
+
+async def measure(app, requests: int) -> float:
+    for _ in range(100):
+        assert await call(app) == 200
+    started = time.perf_counter()
+    for _ in range(requests):
+        await call(app)
+    return requests / (time.perf_counter() - started)
+
+async def main(requests: int):
+    from fastapi import FastAPI
+    from app import app, health_check
+
+    bare = FastAPI()
+    bare.get("/health")(health_check)
+
+    for label, target in (("bare app", bare), ("full stack", app)):
+        rate = await measure(target, requests)
+        print(f"{label:10}: {rate:8.0f} req/s, {1e6 / rate:6.1f} us/request")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
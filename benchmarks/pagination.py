@@ -0,0 +1,57 @@
+"""
+Глубокие страницы списка продуктов (user-008): offset против keyset-курсора
+на таблице из --rows строк, сортировка по id и по name. Запросы строятся
+той же функцией paginate, что и в get_products; обе страницы совпадают.
+
+    python -m benchmarks.pagination --rows 1000000
+"""
+import argparse
+import asyncio
+from typing import List
+from benchmarks.common import init_database, report, timer
+
+async def main(rows: int, limit: int, repeat: int):
+    await init_database()
+    from coffeeapp.core.pagination import encode_cursor, paginate
+    from coffeeapp.db.readonly import select_products
+    from coffeeapp.db.session import SessionLocal, engine
+    from coffeeapp.models.product import Product
+
+    async with engine.begin() as conn:
+        await conn.exec_driver_sql("INSERT INTO categories (name) VALUES ('Bench')")
+        await conn.exec_driver_sql(
+            "WITH RECURSIVE s(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM s WHERE i < %d) "
+            "INSERT INTO products (name, description, price, category_id) "
+            "SELECT 'Product ' || ((i * 7919) %% %d), 'bench', i %% 500, "
+            "(SELECT id FROM categories WHERE name = 'Bench') FROM s" % (rows, rows)
+        )
+        if engine.dialect.name == "postgresql":
+            await conn.exec_driver_sql("ANALYZE products")
+        else:
+            await conn.exec_driver_sql("ANALYZE")
+
+    for label, columns in (("id", [Product.id]), ("name", [Product.name, Product.id])):
+        for depth in (1000, rows // 10, rows // 2, rows - limit):
+            async with SessionLocal() as db:
+                # Последняя строка предыдущей страницы - источник курсора
+                previous = (await db.execute(paginate(select_products(), columns, None, depth - 1, 1))).one()
+                cursor = encode_cursor([getattr(previous, column.key) for column in columns])
+
+                offset_page = paginate(select_products(), columns, None, depth, limit)
+                keyset_page = paginate(select_products(), columns, cursor, 0, limit)
+                assert (await db.execute(offset_page)).all() == (await db.execute(keyset_page)).all()
+
+                for name, query in (("offset", offset_page), ("keyset", keyset_page)):
+                    samples: List[float] = []
+                    for _ in range(repeat):
+                        with timer(samples):
+                            (await db.execute(query)).all()
+                    report(f"sort {label:4} depth {depth:8} {name}", samples)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.limit, args.repeat))
@@ -0,0 +1,51 @@
+"""
+Проверка запросов на SQL-инъекции (user-004), ns на запрос для чистых
+и подозрительных запросов: четыре шаблона через re.search по отдельности
+(как в прежнем SQLInjectionMiddleware), одно скомпилированное выражение
+и оно же с кэшем решений для повторяющихся запросов.
+
+    python -m benchmarks.screening --iterations 200000
+"""
+import argparse
+import re
+import time
+from starlette.datastructures import QueryParams
+from coffeeapp.core.security import SQL_PATTERNS, is_suspicious_request
+
+CASES = {
+    "clean": ("/api/v1/products/products", b"search=latte&category_id=3&sort_by=price&limit=20"),
+    "malicious": ("/api/v1/products/products", b"search=%27%20OR%201%3D1--&limit=20"),
+}
+
+def separate_patterns(path: str, query_string: bytes) -> bool:
+    """Прежняя проверка: восемь вызовов re.search на каждый запрос"""
+    query_params = str(QueryParams(query_string))
+    for pattern in SQL_PATTERNS:
+        if re.search(pattern, path, re.IGNORECASE) or re.search(pattern, query_params, re.IGNORECASE):
+            return True
+    return False
+
+def measure(check, path: str, query_string: bytes, iterations: int) -> float:
+    started = time.perf_counter_ns()
+    for _ in range(iterations):
+        check(path, query_string)
+    return (time.perf_counter_ns() - started) / iterations
+
+def main(iterations: int):
+    combined = is_suspicious_request.__wrapped__
+    for label, (path, query_string) in CASES.items():
+        expected = label == "malicious"
+        assert separate_patterns(path, query_string) is combined(path, query_string) is expected
+        is_suspicious_request.cache_clear()
+        for name, check in (
+            ("separate re.search", separate_patterns),
+            ("combined pattern", combined),
+            ("combined + cache", is_suspicious_request),
+        ):
+            print(f"{label:9} {name:18}: {measure(check, path, query_string, iterations):8.0f} ns/request")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=200000)
+    args = parser.parse_args()
+    main(args.iterations)
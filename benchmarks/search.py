@@ -0,0 +1,64 @@
+"""
+Поиск по каталогу из --products продуктов (user-009): прежний ilike('%term%')
+против поискового индекса (FTS5 в SQLite, pg_trgm/tsvector в PostgreSQL)
+для частых, составных, префиксных запросов и поиска одного товара,
+первая страница из 20.
+
+    python -m benchmarks.search --products 100000
+"""
+import argparse
+import asyncio
+from typing import List
+from benchmarks.common import init_database, report, timer
+
+DRINKS = ["latte", "mocha", "espresso", "americano", "cappuccino", "raf", "flat white", "cortado"]
+FLAVOURS = ["vanilla", "caramel", "hazelnut", "pistachio", "coconut", "lavender", "maple", "ginger",
+            "cinnamon", "honey", "almond", "mint", "orange", "cherry", "banana", "salted"]
+QUERIES = ["latte", "lavender cortado", "pist", "salted mocha 99999", "unknown"]
+
+async def main(products: int, repeat: int):
+    await init_database()
+    from sqlalchemy import insert
+    from coffeeapp.db.readonly import select_products
+    from coffeeapp.db.search import search_products
+    from coffeeapp.db.session import SessionLocal, engine
+    from coffeeapp.models.category import Category
+    from coffeeapp.models.product import Product
+
+    async with engine.begin() as conn:
+        category_id = (await conn.execute(
+            insert(Category).values(name="Bench").returning(Category.id)
+        )).scalar_one()
+        await conn.execute(insert(Product), [
+            {
+                "name": f"{FLAVOURS[i % len(FLAVOURS)]} {DRINKS[i // len(FLAVOURS) % len(DRINKS)]} {i}",
+                "description": f"{FLAVOURS[i * 7 % len(FLAVOURS)]} syrup, batch {i // 1000}",
+                "price": 1 + i % 10,
+                "category_id": category_id,
+            }
+            for i in range(products)
+        ])
+        if engine.dialect.name == "postgresql":
+            await conn.exec_driver_sql("ANALYZE products")
+
+    for term in QUERIES:
+        indexed, rank = search_products(select_products(), term)
+        variants = {
+            "ilike": select_products().filter(Product.name.ilike(f"%{term}%")).order_by(Product.id),
+            "index": indexed.order_by(rank, Product.id),
+        }
+        async with SessionLocal() as db:
+            for name, query in variants.items():
+                query = query.limit(20)
+                samples: List[float] = []
+                for _ in range(repeat):
+                    with timer(samples):
+                        found = (await db.execute(query)).all()
+                report(f"{term!r:20} {name} ({len(found):2} rows)", samples)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.products, args.repeat))
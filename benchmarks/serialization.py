@@ -0,0 +1,59 @@
+"""
+Сериализация списка продуктов (user-024): ORM-объекты через схему ответа
+(TypeAdapter, как до перехода) против Core-строк через orjson (dump_rows)
+при limit 100 и 1000. Оба пути дают одинаковое тело ответа.
+
+    python -m benchmarks.serialization --products 1000
+"""
+import argparse
+import asyncio
+from typing import List
+from benchmarks.common import init_database, report, timer
+
+async def main(products: int, repeat: int):
+    await init_database()
+    from pydantic import TypeAdapter
+    from sqlalchemy import select
+    from coffeeapp.core.responses import dump_rows
+    from coffeeapp.db.readonly import select_products
+    from coffeeapp.db.session import SessionLocal
+    from coffeeapp.models.category import Category
+    from coffeeapp.models.product import Product
+    from coffeeapp.schemas.product import Product as ProductSchema
+
+    async with SessionLocal() as db:
+        category = Category(name="Bench")
+        db.add(category)
+        await db.flush()
+        db.add_all([
+            Product(name=f"Product {i}", description="d" * 40, price=i * 0.5, category_id=category.id)
+            for i in range(products)
+        ])
+        await db.commit()
+
+    adapter = TypeAdapter(List[ProductSchema])
+
+    async def orm(limit: int) -> bytes:
+        async with SessionLocal() as db:
+            objects = (await db.scalars(select(Product).order_by(Product.id).limit(limit))).all()
+            return adapter.dump_json(adapter.validate_python(objects, from_attributes=True))
+
+    async def rows(limit: int) -> bytes:
+        async with SessionLocal() as db:
+            return dump_rows((await db.execute(select_products().order_by(Product.id).limit(limit))).all())
+
+    for limit in (100, 1000):
+        assert await orm(limit) == await rows(limit)
+        for label, build in (("ORM + TypeAdapter", orm), ("rows + orjson", rows)):
+            samples: List[float] = []
+            for _ in range(repeat):
+                with timer(samples):
+                    await build(limit)
+            report(f"limit {limit:4} {label}", samples)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.products, args.repeat))
@@ -1,24 +1,28 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Body
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta, datetime
 from typing import Any, List
 
-from coffeeapp.core.security import create_access_token, verify_password, get_password_hash
+from coffeeapp.core.security import create_access_token, password_hasher
 from coffeeapp.core.config import settings
+from coffeeapp.core.responses import rows_response
+from coffeeapp.core.task_queue import enqueue
+from coffeeapp.db.readonly import select_users
 from coffeeapp.db.session import get_db
 from coffeeapp.models.user import User
 from coffeeapp.schemas.user import Token, UserCreate, UserInDB, UserUpdate, UserRole
-from coffeeapp.core.dependencies import get_current_user
+from coffeeapp.core.dependencies import get_current_user, invalidate_principal, principal_cache
 
 router = APIRouter()
 
 @router.post("/registration", response_model=UserInDB)
-async def registration(user_data: UserCreate, db: Session = Depends(get_db)):
+async def registration(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     """
     Регистрация нового пользователя
     """
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await db.scalar(select(User).filter(User.email == user_data.email))
     if existing_user:
         raise HTTPException(
             status_code=400,
@@ -28,18 +32,25 @@ async def registration(user_data: UserCreate, db: Session = Depends(get_db)):
     new_user = User(
         email=user_data.email,
         username=user_data.username,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await password_hasher.hash(user_data.password),
         verification_expires=datetime.utcnow() + timedelta(days=2)
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.flush()
+    await enqueue(
+        db,
+        "send_welcome_email",
+        {"user_id": new_user.id, "email": new_user.email, "username": new_user.username},
+        idempotency_key=f"welcome:{new_user.id}"
+    )
+    await db.commit()
+    await db.refresh(new_user)
     return new_user
 
 @router.post("/authentication", response_model=Token)
 async def authentication(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Аутентификация пользователя и получение токена
@@ -47,7 +58,7 @@ async def authentication(
     print(f"Login attempt for user: {form_data.username}")
     
     # Ищем пользователя по email
-    user = db.query(User).filter(User.email == form_data.username).first()
+    user = await db.scalar(select(User).filter(User.email == form_data.username))
     
     if not user:
         print(f"User not found: {form_data.username}")
@@ -57,7 +68,10 @@ async def authentication(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    if not verify_password(form_data.password, user.hashed_password):
+    is_valid, new_hash = await password_hasher.verify_and_update(
+        form_data.password, user.hashed_password
+    )
+    if not is_valid:
         print(f"Invalid password for user: {form_data.username}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -65,11 +79,18 @@ async def authentication(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Пересчитываем хэш, если изменились параметры pwd_context
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+        print(f"Password rehashed for user: {form_data.username}")
+    
     # Верифицируем пользователя при успешном входе
     if not user.is_verified:
         user.is_verified = True
         user.verification_expires = None  # Убираем срок истечения верификации
-        db.commit()
+        await db.commit()
+        await invalidate_principal(user.email)
         print(f"User verified: {form_data.username}")
     
     # Создаем токен
@@ -82,7 +103,7 @@ async def authentication(
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/verification")
-async def verification(db: Session = Depends(get_db)):
+async def verification(db: AsyncSession = Depends(get_db)):
     return {"message": "User verified"}
 
 @router.post("/me", response_model=UserInDB)
@@ -91,7 +112,7 @@ async def get_me(current_user: User = Depends(get_current_user)):
 
 @router.get("/users", response_model=List[UserInDB])
 async def get_users(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     # Проверка, является ли текущий пользователь администратором
@@ -101,23 +122,37 @@ async def get_users(
             detail="Недостаточно прав для доступа к этому ресурсу"
         )
     print(current_user)
-    users = db.query(User).all()
-    return users    
+    users = (await db.execute(select_users())).all()
+    return rows_response(users)    
+
+@router.get("/password-hasher/stats")
+async def get_password_hasher_stats(current_user: User = Depends(get_current_user)):
+    """Загрузка пула bcrypt: выполняющиеся хэширования и очередь ожидания"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Недостаточно прав")
+    return password_hasher.stats()
+
+@router.get("/principal-cache/stats")
+async def get_principal_cache_stats(current_user: User = Depends(get_current_user)):
+    """Статистика попаданий в кэш пользователей"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Недостаточно прав")
+    return principal_cache.stats()
 
 @router.get("/user/{user_id}", response_model=UserInDB)
-async def get_user(user_id: int, db: Session = Depends(get_db)):
+async def get_user(user_id: int, db: AsyncSession = Depends(get_db)):
     return {"id": user_id}
 
 @router.put("/user/{user_id}", response_model=UserInDB)
-async def update_user(user_id: int, user: UserUpdate, db: Session = Depends(get_db)):
+async def update_user(user_id: int, user: UserUpdate, db: AsyncSession = Depends(get_db)):
     return {"id": user_id}
 
 @router.patch("/user/{user_id}", response_model=UserInDB)
-async def patch_user(user_id: int, user: UserUpdate, db: Session = Depends(get_db)):
+async def patch_user(user_id: int, user: UserUpdate, db: AsyncSession = Depends(get_db)):
     return {"id": user_id}
 
 @router.delete("/user/{user_id}")
-async def delete_user(user_id: int, db: Session = Depends(get_db)):
+async def delete_user(user_id: int, db: AsyncSession = Depends(get_db)):
     return {"message": "User deleted"}
 
 @router.post("/access", response_model=Token)
@@ -137,7 +172,7 @@ async def update_user_role(
     user_id: int,
     role_data: dict = Body(..., example={"role": "admin"}),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Изменение роли пользователя (только для админа)"""
     print(f"Current user role: {current_user.role}")  # Логируем роль текущего пользователя
@@ -150,7 +185,7 @@ async def update_user_role(
             detail="Только администратор может изменять роли"
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).filter(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=404,
@@ -160,9 +195,16 @@ async def update_user_role(
     try:
         new_role = UserRole(role_data["role"])
         print(f"Setting new role: {new_role} for user {user.email}")  # Логируем изменение
+        await enqueue(db, "audit_role_change", {
+            "actor_id": current_user.id,
+            "user_id": user.id,
+            "old_role": UserRole(user.role).value,
+            "new_role": new_role.value,
+        })
         user.role = new_role
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
+        await invalidate_principal(user.email)
         print("Role updated successfully")  # Логируем успех
         return user
     except ValueError as e:
@@ -1,70 +1,177 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, delete, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from coffeeapp.core.dependencies import get_current_user
+from coffeeapp.db.loading import CART_ITEMS
 from coffeeapp.db.session import get_db
+from coffeeapp.db.upsert import upsert
 from coffeeapp.models.user import User
 from coffeeapp.models.cart import Cart, CartItem
 from coffeeapp.models.product import Product
-from coffeeapp.schemas.cart import CartItemCreate, Cart as CartSchema
+from coffeeapp.schemas.cart import CartItemCreate, CartItemOperation, CartOperation, Cart as CartSchema
 
 router = APIRouter()
 
+async def get_or_create_cart_id(db: AsyncSession, user_id: int) -> int:
+    """Получение или создание корзины пользователя одним запросом (upsert)"""
+    stmt = upsert(Cart).values(user_id=user_id)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Cart.user_id],
+        set_={"user_id": stmt.excluded.user_id}
+    ).returning(Cart.id)
+    return await db.scalar(stmt)
+
 @router.post("/cart")
 async def add_to_cart(
     item: CartItemCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Добавление товара в корзину"""
-    # Получаем или создаем корзину для пользователя
-    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
-    if not cart:
-        cart = Cart(user_id=current_user.id)
-        db.add(cart)
-        db.commit()
-        db.refresh(cart)
+    cart_id = await get_or_create_cart_id(db, current_user.id)
     
-    # Проверяем существование продукта
-    product = db.query(Product).filter(Product.id == item.product_id).first()
-    if not product:
+    # Вставка или увеличение количества одним запросом; строка вставляется,
+    # только если продукт существует
+    stmt = upsert(CartItem).from_select(
+        ["cart_id", "product_id", "quantity"],
+        select(literal(cart_id), Product.id, literal(item.quantity))
+        .where(Product.id == item.product_id)
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CartItem.cart_id, CartItem.product_id],
+        set_={"quantity": CartItem.quantity + stmt.excluded.quantity}
+    )
+    result = await db.execute(stmt)
+    if result.rowcount == 0:
+        await db.rollback()
         raise HTTPException(status_code=404, detail="Продукт не найден")
     
-    # Проверяем, есть ли уже такой товар в корзине
-    cart_item = db.query(CartItem).filter(
-        CartItem.cart_id == cart.id,
-        CartItem.product_id == item.product_id
-    ).first()
-    
-    if cart_item:
-        cart_item.quantity += item.quantity
-    else:
-        cart_item = CartItem(
-            cart_id=cart.id,
-            product_id=item.product_id,
-            quantity=item.quantity
-        )
-        db.add(cart_item)
-    
-    db.commit()
-    db.refresh(cart)
+    await db.commit()
     return {"message": "Товар добавлен в корзину"}
 
 @router.get("/cart", response_model=CartSchema)
-def get_cart(
-    db: Session = Depends(get_db),
+async def get_cart(
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получение корзины пользователя"""
-    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
+    cart = await db.scalar(
+        select(Cart)
+        .options(CART_ITEMS)
+        .filter(Cart.user_id == current_user.id)
+    )
     if not cart:
         raise HTTPException(status_code=404, detail="Корзина пуста")
     return cart
 
+@router.post("/cart/batch", response_model=CartSchema)
+async def batch_update_cart(
+    operations: List[CartItemOperation],
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Пакетное изменение корзины (add/set/remove) в одной транзакции.
+    add с отрицательным количеством уменьшает позицию; позиции с количеством
+    0 и меньше удаляются.
+    """
+    # Сворачиваем операции по товару: ("delta", n) - прибавить к текущему количеству,
+    # ("absolute", n) - установить количество (n <= 0 - удалить товар)
+    changes = {}
+    for operation in operations:
+        mode, value = changes.get(operation.product_id, ("delta", 0))
+        if operation.operation == CartOperation.ADD:
+            changes[operation.product_id] = (mode, value + operation.quantity)
+        elif operation.operation == CartOperation.SET:
+            changes[operation.product_id] = ("absolute", operation.quantity)
+        else:
+            changes[operation.product_id] = ("absolute", 0)
+    
+    # Проверяем одним запросом все продукты, которые могут появиться в корзине
+    added_ids = [product_id for product_id, (_, value) in changes.items() if value > 0]
+    if added_ids:
+        existing_ids = set((await db.scalars(
+            select(Product.id).where(Product.id.in_(added_ids))
+        )).all())
+        missing_ids = sorted(set(added_ids) - existing_ids)
+        if missing_ids:
+            raise HTTPException(status_code=404, detail=f"Продукты не найдены: {missing_ids}")
+    
+    cart_id = await get_or_create_cart_id(db, current_user.id)
+    
+    removed_ids = [product_id for product_id, (mode, value) in changes.items() if mode == "absolute" and value <= 0]
+    if removed_ids:
+        await db.execute(delete(CartItem).where(
+            CartItem.cart_id == cart_id,
+            CartItem.product_id.in_(removed_ids)
+        ))
+    
+    for mode in ("absolute", "delta"):
+        rows = [
+            {"cart_id": cart_id, "product_id": product_id, "quantity": value}
+            for product_id, (change_mode, value) in changes.items()
+            if change_mode == mode and value > 0
+        ]
+        if not rows:
+            continue
+        stmt = upsert(CartItem)
+        quantity = stmt.excluded.quantity
+        if mode == "delta":
+            quantity = CartItem.quantity + stmt.excluded.quantity
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CartItem.cart_id, CartItem.product_id],
+            set_={"quantity": quantity}
+        )
+        await db.execute(stmt, rows)
+    
+    # Уменьшение только существующих позиций; дошедшие до нуля удаляются
+    decrements = [
+        {"item_product_id": product_id, "delta": value}
+        for product_id, (mode, value) in changes.items()
+        if mode == "delta" and value < 0
+    ]
+    if decrements:
+        items = CartItem.__table__
+        await db.execute(
+            update(items)
+            .where(items.c.cart_id == cart_id, items.c.product_id == bindparam("item_product_id"))
+            .values(quantity=items.c.quantity + bindparam("delta")),
+            decrements
+        )
+        await db.execute(delete(CartItem).where(
+            CartItem.cart_id == cart_id,
+            CartItem.product_id.in_([row["item_product_id"] for row in decrements]),
+            CartItem.quantity <= 0
+        ))
+    
+    await db.commit()
+    return await db.scalar(select(Cart).options(CART_ITEMS).filter(Cart.id == cart_id))
+
 @router.delete("/cart/{item_id}")
-async def remove_from_cart(item_id: int, db: Session = Depends(get_db)):
-    return {"message": "Item removed from cart"}
+async def remove_from_cart(
+    item_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Удаление товара из корзины"""
+    result = await db.execute(delete(CartItem).where(
+        CartItem.id == item_id,
+        CartItem.cart_id.in_(select(Cart.id).where(Cart.user_id == current_user.id))
+    ))
+    if result.rowcount == 0:
+        raise HTTPException(status_code=404, detail="Товар не найден в корзине")
+    await db.commit()
+    return {"message": "Товар удален из корзины"}
 
 @router.delete("/cart")
-async def clear_cart(db: Session = Depends(get_db)):
-    return {"message": "Cart cleared"} 
\ No newline at end of file
+async def clear_cart(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Очистка корзины"""
+    await db.execute(delete(CartItem).where(
+        CartItem.cart_id.in_(select(Cart.id).where(Cart.user_id == current_user.id))
+    ))
+    await db.commit()
+    return {"message": "Корзина очищена"}
@@ -1,7 +1,13 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from coffeeapp.core.dependencies import get_current_user
+from coffeeapp.core.pagination import paginate, next_cursor
+from coffeeapp.core.menu_cache import menu_cache, menu_cache_key, normalize_search, dump_json, make_entry, cached_menu_response, menu_response, invalidate_menu
+from coffeeapp.core.responses import dump_rows
+from coffeeapp.db.readonly import select_categories
 from coffeeapp.db.session import get_db
 from coffeeapp.models.user import User, UserRole
 from coffeeapp.models.category import Category
@@ -9,10 +15,12 @@ from coffeeapp.schemas.category import CategoryCreate, CategoryUpdate, Category
 
 router = APIRouter()
 
+category_adapter = TypeAdapter(CategorySchema)
+
 @router.post("/category", response_model=CategorySchema)
-def create_category(
+async def create_category(
     category_in: CategoryCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Создание новой категории"""
@@ -21,92 +29,122 @@ def create_category(
     
     category = Category(**category_in.dict())
     db.add(category)
-    db.commit()
-    db.refresh(category)
+    await db.commit()
+    await db.refresh(category)
+    await invalidate_menu(db)
     return category
 
 @router.get("/categories", response_model=List[CategorySchema])
-def get_categories(
-    db: Session = Depends(get_db),
+async def get_categories(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (заголовок X-Next-Cursor)"),
     search: Optional[str] = Query(None, description="Поиск по названию")
 ):
     """Получение списка категорий с фильтрацией и пагинацией"""
-    query = db.query(Category)
+    cache_key = menu_cache_key(
+        "categories",
+        skip=None if cursor else skip,
+        limit=limit,
+        cursor=cursor,
+        search=normalize_search(search)
+    )
+    response = cached_menu_response(request, cache_key)
+    if response is not None:
+        return response
+    
+    query = select_categories()
     
     if search:
         query = query.filter(Category.name.ilike(f"%{search}%"))
     
-    categories = query.offset(skip).limit(limit).all()
-    return categories
+    order_columns = [Category.id]
+    categories = (await db.execute(paginate(query, order_columns, cursor, skip, limit))).all()
+    entry = make_entry(
+        dump_rows(categories),
+        next_cursor(categories, order_columns, limit)
+    )
+    menu_cache.set(cache_key, entry)
+    return menu_response(cache_key, entry)
 
 @router.get("/category/{category_id}", response_model=CategorySchema)
-def get_category(category_id: int, db: Session = Depends(get_db)):
+async def get_category(category_id: int, request: Request, db: AsyncSession = Depends(get_db)):
     """Получение категории по ID"""
-    category = db.query(Category).filter(Category.id == category_id).first()
+    cache_key = menu_cache_key("category", id=category_id)
+    response = cached_menu_response(request, cache_key)
+    if response is not None:
+        return response
+    
+    category = await db.scalar(select(Category).filter(Category.id == category_id))
     if not category:
         raise HTTPException(status_code=404, detail="Категория не найдена")
-    return category
+    entry = make_entry(dump_json(category_adapter, category))
+    menu_cache.set(cache_key, entry)
+    return menu_response(cache_key, entry)
 
 @router.put("/category/{category_id}", response_model=CategorySchema)
-def update_category(
+async def update_category(
     category_id: int,
     category_in: CategoryUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Обновление категории"""
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Только администратор может обновлять категории")
     
-    category = db.query(Category).filter(Category.id == category_id).first()
+    category = await db.scalar(select(Category).filter(Category.id == category_id))
     if not category:
         raise HTTPException(status_code=404, detail="Категория не найдена")
     
     for field, value in category_in.dict(exclude_unset=True).items():
         setattr(category, field, value)
     
-    db.commit()
-    db.refresh(category)
+    await db.commit()
+    await db.refresh(category)
+    await invalidate_menu(db)
     return category
 
 @router.patch("/category/{category_id}", response_model=CategorySchema)
-def patch_category(
+async def patch_category(
     category_id: int,
     category_in: CategoryUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Частичное обновление категории"""
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Только администратор может обновлять категории")
     
-    category = db.query(Category).filter(Category.id == category_id).first()
+    category = await db.scalar(select(Category).filter(Category.id == category_id))
     if not category:
         raise HTTPException(status_code=404, detail="Категория не найдена")
     
     for field, value in category_in.dict(exclude_unset=True).items():
         setattr(category, field, value)
     
-    db.commit()
-    db.refresh(category)
+    await db.commit()
+    await db.refresh(category)
+    await invalidate_menu(db)
     return category
 
 @router.delete("/category/{category_id}")
-def delete_category(
+async def delete_category(
     category_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Удаление категории"""
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Только администратор может удалять категории")
     
-    category = db.query(Category).filter(Category.id == category_id).first()
+    category = await db.scalar(select(Category).filter(Category.id == category_id))
     if not category:
         raise HTTPException(status_code=404, detail="Категория не найдена")
     
-    db.delete(category)
-    db.commit()
+    await db.delete(category)
+    await db.commit()
+    await invalidate_menu(db)
     return {"message": "Категория успешно удалена"} 
\ No newline at end of file
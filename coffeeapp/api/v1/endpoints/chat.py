@@ -1,60 +1,613 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import List
-from jose import JWTError, jwt
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from coffeeapp.core.broker import Broker, create_broker
+from coffeeapp.core.config import settings
+from coffeeapp.core.dependencies import get_current_user
+from coffeeapp.core.ids import snowflake
+from coffeeapp.core.pagination import NEXT_CURSOR_HEADER, paginate, next_cursor
+from coffeeapp.core.responses import rows_response
+from coffeeapp.db.chat_history import chat_history, history_query, load_missed
+from coffeeapp.db.session import SessionLocal, get_db
+from coffeeapp.models.chat import ChatMessage
+from coffeeapp.models.user import User, UserRole
+from coffeeapp.schemas.chat import ChatMessage as ChatMessageSchema
 
 router = APIRouter()
 
-SECRET_KEY = "hikamoruru"
-ALGORITHM = "HS256"
+# Служебный канал брокера: присутствие и назначение администраторов
+CONTROL_CHANNEL = "control"
+STAFF_ROOM = "staff"
+# Табло бариста: новые заказы и смены статусов
+ORDERS_ROOM = "orders"
+
+# Код закрытия для клиентов, не успевающих читать сообщения (Try Again Later)
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+def support_room(customer_id: int) -> str:
+    """Комната переписки клиента с поддержкой"""
+    return f"support:{customer_id}"
+
+def user_room(user_id: int) -> str:
+    """Личная комната пользователя (все его соединения)"""
+    return f"user:{user_id}"
+
+def support_customer_id(room: str) -> Optional[int]:
+    """id клиента из имени комнаты поддержки; None - не комната поддержки"""
+    prefix, _, customer_id = room.partition(":")
+    if prefix != "support" or not customer_id.isdigit():
+        return None
+    return int(customer_id)
+
+def presence_room(room: str) -> bool:
+    """Присутствие отслеживается в очереди персонала и в комнатах поддержки"""
+    return room == STAFF_ROOM or support_customer_id(room) is not None
+
+class ClientConnection:
+    """Ограниченная исходящая очередь и отдельная задача-писатель для одного WebSocket"""
+
+    def __init__(self, websocket: WebSocket, user: User, manager: "ConnectionManager"):
+        self.websocket = websocket
+        self.user_id = user.id
+        self.username = user.username
+        self.is_staff = user.role == UserRole.ADMIN
+        self.rooms: Set[str] = set()
+        # Соединение чата (не поток заказов) - учитывается в присутствии
+        self.tracks_presence = False
+        # Пока идет догрузка истории, живые сообщения откладываются сюда
+        self.pending: Optional[list] = None
+        self.manager = manager
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.CHAT_SEND_QUEUE_SIZE)
+        self.writer = asyncio.create_task(self._write())
+
+    def enqueue(self, message: dict) -> bool:
+        """Постановка в очередь без ожидания; False - клиент не успевает и должен быть отключен"""
+        if self.pending is not None:
+            self.pending.append(message)
+            return True
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            if settings.CHAT_SLOW_CONSUMER_POLICY != "drop":
+                return False
+            # Политика drop: отбрасываем самое старое сообщение
+            self.queue.get_nowait()
+            self.queue.put_nowait(message)
+            return True
+
+    async def _put(self, message: dict) -> bool:
+        """Постановка в очередь с ожиданием места, пока соединение живо"""
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            pass
+        put = asyncio.ensure_future(self.queue.put(message))
+        await asyncio.wait({put, self.writer}, return_when=asyncio.FIRST_COMPLETED)
+        if not put.done():
+            put.cancel()
+            return False
+        return True
+
+    async def replay(self, messages: List[str], message_ids: Set[int]):
+        """
+        Отправка пропущенных сообщений, затем отложенных живых без повторов.
+        Догрузка больше исходящей очереди, поэтому здесь ждем писателя, а не отключаем.
+        """
+        for message in messages:
+            if not await self._put({"type": "websocket.send", "text": message}):
+                break
+        while self.pending:
+            message = self.pending.pop(0)
+            if json.loads(message["text"]).get("id") not in message_ids:
+                if not await self._put(message):
+                    break
+        self.pending = None
+
+    async def _write(self):
+        try:
+            while True:
+                message = await self.queue.get()
+                await self.websocket.send(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Delivery error: {e}")
+            self.manager.disconnect(self.websocket)
+
+    async def close(self, code: int):
+        self.writer.cancel()
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+    """
+    Локальные WebSocket-соединения воркера, сгруппированные по комнатам.
+    Рассылка идет через брокер: каждый воркер слушает брокер и раскладывает
+    сообщения комнаты по очередям только ее участников.
+    """
 
-    async def connect(self, websocket: WebSocket):
-        self.active_connections.append(websocket)
+    def __init__(self, broker: Broker):
+        self.active_connections: Dict[WebSocket, ClientConnection] = {}
+        self.rooms: Dict[str, Set[ClientConnection]] = {}
+        # Назначения администраторов, собираемые из служебного канала
+        self.assignments: Dict[int, int] = {}
+        # Обработчики событий комнаты внутри процесса (например, индекс очереди заказов)
+        self.room_handlers: Dict[str, List[Callable[[str], None]]] = {}
+        # Присутствие на других воркерах: воркер -> (срок действия, {комната: {user_id: username}}).
+        # Воркер рассылает свой список каждые CHAT_PRESENCE_INTERVAL секунд; список упавшего
+        # воркера перестает учитываться через три интервала
+        self.node_id = uuid.uuid4().hex
+        self.presence: Dict[str, Tuple[float, Dict[str, Dict[int, str]]]] = {}
+        self.broker = broker
+        self._listener: Optional[asyncio.Task] = None
+        self._listener_lock = asyncio.Lock()
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._sync_requested: Optional[asyncio.Event] = None
 
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+    def add_room_handler(self, room: str, handler: Callable[[str], None]):
+        self.room_handlers.setdefault(room, []).append(handler)
 
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            await connection.send_text(message)
+    async def start(self):
+        # Подписка оформляется до первой публикации, иначе воркер теряет собственные события
+        async with self._listener_lock:
+            if self._listener is None:
+                messages = await self.broker.subscribe()
+                self._listener = asyncio.create_task(self._listen(messages))
+                self._sync_requested = asyncio.Event()
+                self._heartbeat = asyncio.create_task(self._run_heartbeat())
+                # Остальные воркеры сразу присылают свои списки присутствия
+                await self.publish_control(type="presence_request", node=self.node_id)
 
-manager = ConnectionManager()
+    async def register(
+        self, websocket: WebSocket, user: User, rooms: List[str], replaying: bool = False
+    ) -> ClientConnection:
+        """Регистрация соединения в заданных комнатах, без событий присутствия"""
+        await self.start()
+        connection = ClientConnection(websocket, user, self)
+        if replaying:
+            connection.pending = []
+        self.active_connections[websocket] = connection
+        for room in rooms:
+            self.join(connection, room)
+        return connection
 
-def get_username_from_token(token: str):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise JWTError
-        return username
-    except JWTError as e:
-        print(f"Token decoding error: {e}")
+    async def connect(
+        self, websocket: WebSocket, user: User, last_seen_id: Optional[int] = None
+    ) -> ClientConnection:
+        """Подключение к чату: личная комната, поддержка или очередь персонала, присутствие"""
+        if user.role == UserRole.ADMIN:
+            rooms = [user_room(user.id), STAFF_ROOM]
+        else:
+            rooms = [user_room(user.id), support_room(user.id)]
+        connection = await self.register(websocket, user, rooms, replaying=last_seen_id is not None)
+        connection.tracks_presence = True
+
+        connection.enqueue({"type": "websocket.send", "text": self.presence_snapshot(connection)})
+        await self.publish_presence(connection, "online", connection.rooms)
+        if last_seen_id is not None:
+            rows = []
+            try:
+                rows = await load_missed(
+                    connection.rooms, connection.user_id, last_seen_id,
+                    settings.CHAT_HISTORY_REPLAY_LIMIT
+                )
+            except Exception as e:
+                print(f"Chat replay error: {e}")
+            await connection.replay(
+                [message_json(row) for row in rows], {row.id for row in rows}
+            )
+        return connection
+
+    def disconnect(self, websocket: WebSocket) -> Optional[ClientConnection]:
+        connection = self.active_connections.pop(websocket, None)
+        if connection is not None:
+            connection.writer.cancel()
+            # connection.rooms остается: по нему снимаются назначения (release_assignments)
+            for room in connection.rooms:
+                self._unindex(connection, room)
+        return connection
+
+    def join(self, connection: ClientConnection, room: str):
+        self.rooms.setdefault(room, set()).add(connection)
+        connection.rooms.add(room)
+
+    def leave(self, connection: ClientConnection, room: str):
+        self._unindex(connection, room)
+        connection.rooms.discard(room)
+
+    def _unindex(self, connection: ClientConnection, room: str):
+        members = self.rooms.get(room)
+        if members is not None:
+            members.discard(connection)
+            if not members:
+                del self.rooms[room]
+
+    async def release_assignments(self, connection: ClientConnection, rooms):
+        """
+        Администратор вышел из комнат поддержки (leave или отключение): его клиенты
+        снова видны всей очереди и могут писать другим администраторам.
+        """
+        for room in list(rooms):
+            customer_id = support_customer_id(room)
+            if customer_id is None or self.assignments.get(customer_id) != connection.user_id:
+                continue
+            # Другое соединение того же администратора на этом воркере еще в комнате
+            if any(other.user_id == connection.user_id for other in self.rooms.get(room, ())):
+                continue
+            await self.publish_control(
+                type="unassigned", customer_id=customer_id, admin_id=connection.user_id
+            )
+
+    def local_presence(self) -> Dict[str, Dict[int, str]]:
+        """Пользователи чата этого воркера по комнатам присутствия"""
+        rooms: Dict[str, Dict[int, str]] = {}
+        for connection in self.active_connections.values():
+            if connection.tracks_presence:
+                for room in connection.rooms:
+                    if presence_room(room):
+                        rooms.setdefault(room, {})[connection.user_id] = connection.username
+        return rooms
+
+    def online(self) -> Dict[str, Dict[int, str]]:
+        """Присутствие по всем воркерам: свой воркер - по соединениям, остальные - по их спискам"""
+        now = time.monotonic()
+        rooms = self.local_presence()
+        for node, (expires_at, node_rooms) in list(self.presence.items()):
+            if expires_at < now:
+                del self.presence[node]
+            elif node != self.node_id:
+                for room, users in node_rooms.items():
+                    rooms.setdefault(room, {}).update(users)
+        return rooms
+
+    def presence_snapshot(self, connection: ClientConnection) -> str:
+        """Кто уже в сети: персоналу - во всех комнатах, клиенту - в его комнатах"""
+        rooms = {
+            room: users for room, users in self.online().items()
+            if connection.is_staff or room in connection.rooms
+        }
+        return json.dumps({
+            "type": "presence_snapshot",
+            "online": {
+                room: [{"user_id": user_id, "username": username} for user_id, username in users.items()]
+                for room, users in sorted(rooms.items())
+            },
+        })
+
+    async def publish_presence(self, connection: ClientConnection, status: str, rooms: Iterable[str]):
+        """Вход или выход пользователя из комнат; выход - только если других его соединений там нет"""
+        rooms = [room for room in rooms if presence_room(room)]
+        if status == "offline":
+            rooms = [
+                room for room in rooms
+                if not any(other.user_id == connection.user_id for other in self.rooms.get(room, ()))
+            ]
+        if rooms:
+            await self.publish_control(
+                type="presence", node=self.node_id, user_id=connection.user_id,
+                username=connection.username, status=status, rooms=sorted(rooms)
+            )
+
+    async def sync_presence(self):
+        rooms = self.local_presence()
+        await self.publish_control(
+            type="presence_sync", node=self.node_id,
+            rooms={room: list(users.items()) for room, users in rooms.items()}
+        )
+
+    async def _run_heartbeat(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._sync_requested.wait(), settings.CHAT_PRESENCE_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._sync_requested.clear()
+            try:
+                await self.sync_presence()
+            except Exception as e:
+                print(f"Presence sync error: {e}")
+
+    async def broadcast(self, message: str, room: str):
+        await self.broker.publish(room, message)
+
+    async def publish_control(self, **event):
+        await self.broker.publish(CONTROL_CHANNEL, json.dumps(event))
+
+    async def _listen(self, messages):
+        # Один слушатель на воркер сохраняет порядок сообщений внутри комнаты
+        async for room, message in messages:
+            if room == CONTROL_CHANNEL:
+                self._handle_control(message)
+            else:
+                for handler in self.room_handlers.get(room, ()):
+                    try:
+                        handler(message)
+                    except Exception as e:
+                        print(f"Room handler error: {e}")
+                self._deliver(room, message)
+            # Даем задачам-писателям разобрать очереди между сообщениями
+            await asyncio.sleep(0)
+
+    def _handle_control(self, message: str):
+        event = json.loads(message)
+        expires_at = time.monotonic() + 3 * settings.CHAT_PRESENCE_INTERVAL
+        if event["type"] == "presence":
+            _, rooms = self.presence.get(event["node"], (0.0, {}))
+            for room in event["rooms"]:
+                users = rooms.setdefault(room, {})
+                if event["status"] == "online":
+                    users[event["user_id"]] = event["username"]
+                else:
+                    users.pop(event["user_id"], None)
+                    if not users:
+                        del rooms[room]
+            self.presence[event["node"]] = (expires_at, rooms)
+            self._deliver_to(self._members(STAFF_ROOM, *event["rooms"]), message)
+        elif event["type"] == "presence_sync":
+            self.presence[event["node"]] = (expires_at, {
+                room: {user_id: username for user_id, username in users}
+                for room, users in event["rooms"].items()
+            })
+        elif event["type"] == "presence_request":
+            if self._sync_requested is not None:
+                self._sync_requested.set()
+        elif event["type"] == "assigned":
+            self.assignments[event["customer_id"]] = event["admin_id"]
+            self._deliver(support_room(event["customer_id"]), message)
+        elif event["type"] == "unassigned":
+            # Событие устарело, если клиента уже взял другой администратор
+            if self.assignments.get(event["customer_id"]) == event["admin_id"]:
+                del self.assignments[event["customer_id"]]
+            self._deliver_to(self._members(support_room(event["customer_id"]), STAFF_ROOM), message)
+
+    def _members(self, *rooms: str) -> Set[ClientConnection]:
+        """Участники нескольких комнат без повторов"""
+        return set().union(*(self.rooms.get(room, ()) for room in rooms))
+
+    def _deliver(self, room: str, message: str):
+        self._deliver_to(list(self.rooms.get(room, ())), message)
+
+    def _deliver_to(self, connections: Iterable[ClientConnection], message: str):
+        # ASGI-сообщение собирается один раз на всю рассылку, доставка - только участникам комнаты
+        event = {"type": "websocket.send", "text": message}
+        for connection in connections:
+            if not connection.enqueue(event):
+                print("Slow consumer disconnected")
+                self.disconnect(connection.websocket)
+                asyncio.create_task(connection.close(SLOW_CONSUMER_CLOSE_CODE))
+
+    async def close(self):
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        for websocket in list(self.active_connections):
+            self.disconnect(websocket)
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+            try:
+                # Пустой список: остальные воркеры сразу забывают пользователей этого воркера
+                await self.sync_presence()
+            except Exception as e:
+                print(f"Presence sync error: {e}")
+        await self.broker.close()
+
+manager = ConnectionManager(create_broker())
+
+async def get_user_from_token(token: Optional[str]) -> Optional[User]:
+    if not token:
         return None
+    async with SessionLocal() as db:
+        try:
+            return await get_current_user(db=db, token=token)
+        except HTTPException:
+            return None
+
+async def user_exists(user_id: int) -> bool:
+    async with SessionLocal() as db:
+        return await db.scalar(select(User.id).filter(User.id == user_id)) is not None
+
+def message_json(message) -> str:
+    """Сообщение чата в формате протокола (из строки истории или записи буфера)"""
+    return json.dumps({
+        "type": "message",
+        "id": message.id,
+        "room": message.room,
+        "user_id": message.user_id,
+        "from": message.username,
+        "text": message.text,
+        "created_at": message.created_at.isoformat(),
+    })
+
+class OutgoingMessage:
+    __slots__ = ("id", "room", "user_id", "username", "text", "created_at")
+
+    def __init__(self, connection: ClientConnection, room: str, text: str):
+        self.id = snowflake.next_id()
+        self.room = room
+        self.user_id = connection.user_id
+        self.username = connection.username
+        self.text = text
+        self.created_at = datetime.utcnow()
+
+def record_message(
+    connection: ClientConnection, room: str, text: str, recipient_id: Optional[int] = None
+) -> str:
+    """Присвоение id, постановка в буфер истории и сериализация для рассылки"""
+    message = OutgoingMessage(connection, room, text)
+    chat_history.add({
+        "id": message.id,
+        "room": room,
+        "sender_id": connection.user_id,
+        "recipient_id": recipient_id,
+        "text": text,
+        "created_at": message.created_at,
+    })
+    return message_json(message)
+
+async def handle_client_message(connection: ClientConnection, data: str):
+    """
+    Входящие сообщения клиента (JSON):
+    {"action": "message", "text": ..., "room": ...} - в комнату (клиент пишет только в свою поддержку);
+    {"action": "direct", "to": user_id, "text": ...} - личное сообщение;
+    {"action": "join" | "leave", "room": ...} - вход в комнату (только администраторы).
+    Обычный текст считается сообщением в комнату поддержки клиента.
+    """
+    try:
+        payload = json.loads(data)
+        if not isinstance(payload, dict):
+            raise ValueError
+    except ValueError:
+        payload = {"action": "message", "text": data}
+
+    action = payload.get("action", "message")
+    text = payload.get("text", "")
+    if action in ("message", "direct") and not isinstance(text, str):
+        return
+
+    if action == "message":
+        if connection.is_staff:
+            room = str(payload.get("room"))
+            if room != STAFF_ROOM and support_customer_id(room) is None:
+                return
+        else:
+            room = support_room(connection.user_id)
+        message = record_message(connection, room, text)
+        await manager.broadcast(message, room)
+        # Пока клиенту не назначен администратор, сообщения видит вся очередь поддержки
+        if not connection.is_staff and connection.user_id not in manager.assignments:
+            await manager.broadcast(message, STAFF_ROOM)
+
+    elif action == "direct":
+        recipient_id = payload.get("to")
+        if not isinstance(recipient_id, int):
+            return
+        # Клиент может писать лично только назначенному ему администратору
+        if not connection.is_staff and manager.assignments.get(connection.user_id) != recipient_id:
+            return
+        # Сообщение несуществующему пользователю не запишется в историю (внешний ключ)
+        if not await user_exists(recipient_id):
+            return
+        message = record_message(connection, user_room(recipient_id), text, recipient_id)
+        await manager.broadcast(message, user_room(recipient_id))
+        await manager.broadcast(message, user_room(connection.user_id))
+
+    elif action in ("join", "leave") and connection.is_staff:
+        room = str(payload.get("room"))
+        customer_id = support_customer_id(room)
+        if customer_id is None:
+            return
+        if action == "leave":
+            manager.leave(connection, room)
+            await manager.release_assignments(connection, [room])
+            await manager.publish_presence(connection, "offline", [room])
+            return
+        manager.join(connection, room)
+        await manager.publish_presence(connection, "online", [room])
+        await manager.publish_control(
+            type="assigned",
+            customer_id=customer_id,
+            admin_id=connection.user_id,
+            admin=connection.username
+        )
 
 @router.websocket("/ws/chat")
 async def websocket_endpoint(websocket: WebSocket):
+    """
+    Подключение: /ws/chat?token=...[&last_seen_id=...].
+    С last_seen_id после подключения приходят пропущенные сообщения комнат.
+    """
     token = websocket.query_params.get("token")
-    username = get_username_from_token(token)
-    if username is None:
+    last_seen_id = websocket.query_params.get("last_seen_id")
+    last_seen_id = int(last_seen_id) if last_seen_id and last_seen_id.isdigit() else None
+    user = await get_user_from_token(token)
+    if user is None:
         print("Invalid token")
         await websocket.close()
         return
 
+    username = user.username
     await websocket.accept()
-    await manager.connect(websocket)
+    connection = await manager.connect(websocket, user, last_seen_id)
     print(f"User {username} connected")
     try:
         while True:
             data = await websocket.receive_text()
             print(f"User {username} sent: {data}")
-            await manager.broadcast(f"Message from {username}: {data}")
+            await handle_client_message(connection, data)
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
         print(f"User {username} disconnected")
-        await manager.broadcast(f"User {username} disconnected.")
     except Exception as e:
         print(f"Error with user {username}: {e}")
-        manager.disconnect(websocket) 
+    finally:
+        manager.disconnect(websocket)
+        await manager.release_assignments(connection, connection.rooms)
+        await manager.publish_presence(connection, "offline", connection.rooms)
+
+@router.websocket("/ws/orders")
+async def orders_endpoint(websocket: WebSocket):
+    """
+    Поток событий заказов вместо опроса GET /orders/{id}:
+    администратор (табло бариста) получает все новые и измененные заказы,
+    клиент - смены статусов своих заказов.
+    """
+    user = await get_user_from_token(websocket.query_params.get("token"))
+    if user is None:
+        print("Invalid token")
+        await websocket.close()
+        return
+
+    await websocket.accept()
+    rooms = [ORDERS_ROOM] if user.role == UserRole.ADMIN else [user_room(user.id)]
+    await manager.register(websocket, user, rooms)
+    try:
+        while True:
+            # Входящие сообщения не ожидаются, цикл только отслеживает отключение
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        manager.disconnect(websocket)
+
+@router.get(f"{settings.API_V1_STR}/chat/history", response_model=List[ChatMessageSchema], tags=["chat"])
+async def get_chat_history(
+    room: str = Query(..., description="support:<id клиента>, user:<id> или staff"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Курсор более старой страницы (заголовок X-Next-Cursor)"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """История комнаты от новых сообщений к старым"""
+    if current_user.role != UserRole.ADMIN and room not in (
+        support_room(current_user.id), user_room(current_user.id)
+    ):
+        raise HTTPException(status_code=403, detail="Недостаточно прав")
+
+    # Для личной комнаты добавляются и отправленные пользователем сообщения
+    user_id = None
+    if room.startswith("user:") and room[len("user:"):].isdigit():
+        user_id = int(room[len("user:"):])
+
+    # Свои еще не записанные сообщения тоже должны попасть в выдачу
+    await chat_history.flush()
+
+    history_columns = [ChatMessage.id]
+    rows = (await db.execute(paginate(
+        history_query([room], user_id), history_columns, cursor, 0, limit, descending=True
+    ))).all()
+
+    headers = {}
+    next_page = next_cursor(rows, history_columns, limit)
+    if next_page:
+        headers[NEXT_CURSOR_HEADER] = next_page
+    return rows_response(rows, headers)
@@ -1,101 +1,155 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
+import json
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+from coffeeapp.api.v1.endpoints.chat import ORDERS_ROOM, manager as chat_manager, user_room
 from coffeeapp.core.dependencies import get_current_user
+from coffeeapp.core.order_queue import order_queue
+from coffeeapp.core.task_queue import enqueue
+from coffeeapp.core.pagination import NEXT_CURSOR_HEADER, paginate, next_cursor
+from coffeeapp.core.responses import FastJSONResponse
+from coffeeapp.db.loading import ORDER_ITEMS
+from coffeeapp.db.readonly import select_orders, with_order_items
 from coffeeapp.db.session import get_db
 from coffeeapp.models.user import User, UserRole
 from coffeeapp.models.order import Order, OrderItem, OrderStatus
-from coffeeapp.models.cart import Cart
+from coffeeapp.models.cart import Cart, CartItem
+from coffeeapp.models.product import Product
 from coffeeapp.schemas.order import Order as OrderSchema, OrderCreate, OrderUpdate
 
 router = APIRouter()
 
+# Очереди остальных воркеров обновляются событиями заказов из брокера
+chat_manager.add_room_handler(ORDERS_ROOM, order_queue.apply_event)
+
+async def publish_order_event(event_type: str, order: Order, notify_owner: bool = False):
+    """
+    Событие заказа для табло бариста и (при notify_owner) для сокетов владельца.
+    Ошибка брокера не должна отменять уже зафиксированное изменение.
+    """
+    payload = OrderSchema.model_validate(order).model_dump(mode="json")
+    # Своя очередь обновляется сразу, не дожидаясь брокера
+    order_queue.apply(payload)
+    message = json.dumps({"type": event_type, "order": payload})
+    try:
+        await chat_manager.broadcast(message, ORDERS_ROOM)
+        if notify_owner:
+            await chat_manager.broadcast(message, user_room(order.user_id))
+    except Exception as e:
+        print(f"Order event publish error: {e}")
+
 @router.post("/", response_model=OrderSchema)
-def create_order(
-    db: Session = Depends(get_db),
+async def create_order(
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Создание заказа из корзины"""
-    # Получаем корзину пользователя
-    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
-    if not cart or not cart.items:
+    """Создание заказа из корзины (одна транзакция)"""
+    # Товары корзины вместе с ценами одним запросом; строки блокируются до конца транзакции
+    cart_rows = (await db.execute(
+        select(CartItem.id, CartItem.product_id, CartItem.quantity, Product.price)
+        .join(Cart, Cart.id == CartItem.cart_id)
+        .join(Product, Product.id == CartItem.product_id)
+        .filter(Cart.user_id == current_user.id)
+        .with_for_update(of=CartItem)
+    )).all()
+    if not cart_rows:
         raise HTTPException(status_code=400, detail="Корзина пуста")
     
-    # Создаем заказ
-    order = Order(user_id=current_user.id)
-    db.add(order)
-    db.commit()  
-    db.refresh(order)
-    
-    total_amount = 0.0
-    
-    # Переносим товары из корзины в заказ
-    for cart_item in cart.items:
-        order_item = OrderItem(
-            order_id=order.id,  
-            product_id=cart_item.product_id,
-            quantity=cart_item.quantity,
-            price=cart_item.product.price
-        )
-        total_amount += order_item.price * order_item.quantity
-        db.add(order_item)
-    
-    order.total_amount = total_amount
+    total_amount = sum(row.price * row.quantity for row in cart_rows)
     
+    # Создаем заказ; flush нужен только для получения id
+    order = Order(user_id=current_user.id, total_amount=total_amount)
+    db.add(order)
+    await db.flush()
     
-    for item in cart.items:
-        db.delete(item)
+    # Переносим товары из корзины в заказ одной пакетной вставкой
+    items = (await db.scalars(
+        insert(OrderItem).returning(OrderItem),
+        [
+            {
+                "order_id": order.id,
+                "product_id": row.product_id,
+                "quantity": row.quantity,
+                "price": row.price,
+            }
+            for row in cart_rows
+        ]
+    )).all()
+    set_committed_value(order, "items", list(items))
     
-    db.commit()
-    db.refresh(order)
+    await db.execute(delete(CartItem).where(CartItem.id.in_([row.id for row in cart_rows])))
+    await enqueue(
+        db,
+        "send_order_receipt",
+        {"order_id": order.id, "user_id": current_user.id, "total_amount": total_amount},
+        idempotency_key=f"receipt:{order.id}"
+    )
+    await db.commit()
+    await publish_order_event("order_created", order)
     return order
 
 @router.get("/orders", response_model=List[OrderSchema])
-def get_orders(
-    db: Session = Depends(get_db),
+async def get_orders(
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (заголовок X-Next-Cursor)")
 ):
     """Получение списка заказов пользователя"""
 
-    orders = db.query(Order).filter(
-        Order.user_id == current_user.id
-    ).offset(skip).limit(limit).all()
+    order_columns = [Order.created_at, Order.id]
+    query = select_orders().filter(Order.user_id == current_user.id)
+    orders = (await db.execute(paginate(query, order_columns, cursor, skip, limit))).all()
     
+    headers = {}
+    next_page = next_cursor(orders, order_columns, limit)
+    if next_page:
+        headers[NEXT_CURSOR_HEADER] = next_page
+
+    return FastJSONResponse(await with_order_items(db, orders), headers=headers)
 
-    return orders
+@router.get("/queue", response_model=List[OrderSchema])
+async def get_active_queue(current_user: User = Depends(get_current_user)):
+    """Открытые заказы (pending, confirmed, preparing) от старых к новым - из индекса в памяти"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Недостаточно прав")
+    return FastJSONResponse(order_queue.body())
 
 @router.get("/{order_id}", response_model=OrderSchema)
-def get_order(
+async def get_order(
     order_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получение информации о заказе"""
     
-    order = db.query(Order).options(joinedload(Order.items)).filter(
-        Order.id == order_id,
-        Order.user_id == current_user.id
-    ).first()
+    order = await db.scalar(
+        select(Order).options(ORDER_ITEMS).filter(
+            Order.id == order_id,
+            Order.user_id == current_user.id
+        )
+    )
     
     if not order:
         raise HTTPException(status_code=404, detail="Заказ не найден")
     return order
 
 @router.put("/order/{order_id}", response_model=OrderSchema)
-async def update_order(order_id: int, order: OrderUpdate, db: Session = Depends(get_db)):
+async def update_order(order_id: int, order: OrderUpdate, db: AsyncSession = Depends(get_db)):
     return {"id": order_id, "created_at": "2024-03-20T12:00:00", "items": []}
 
 @router.delete("/order/{order_id}")
-async def delete_order(order_id: int, db: Session = Depends(get_db)):
+async def delete_order(order_id: int, db: AsyncSession = Depends(get_db)):
     return {"message": "Order deleted"}
 
 @router.patch("/order/{order_id}", response_model=OrderSchema)
 async def update_order_status(
     order_id: int,
     status: OrderStatus,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Обновление статуса заказа (только для администраторов)"""
@@ -104,7 +158,9 @@ async def update_order_status(
 
 
     
-    order = db.query(Order).filter(Order.id == order_id).first()    
+    order = await db.scalar(
+        select(Order).options(ORDER_ITEMS).filter(Order.id == order_id)
+    )    
     
     if not order.user_id or not order.status or not order.total_amount:
         raise ValueError("Missing required order fields")
@@ -113,6 +169,7 @@ async def update_order_status(
         raise HTTPException(status_code=404, detail="Заказ не найден")
     
     order.status = status
-    db.commit()
-    db.refresh(order)
+    await db.commit()
+    await db.refresh(order)
+    await publish_order_event("order_status", order, notify_owner=True)
     return order
\ No newline at end of file
@@ -1,18 +1,27 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from coffeeapp.core.dependencies import get_current_user
+from coffeeapp.core.pagination import paginate, next_cursor
+from coffeeapp.core.menu_cache import menu_cache, menu_cache_key, normalize_search, dump_json, make_entry, cached_menu_response, menu_response, invalidate_menu
+from coffeeapp.core.responses import dump_rows
+from coffeeapp.db.readonly import select_products
 from coffeeapp.db.session import get_db
+from coffeeapp.db.search import search_products
 from coffeeapp.models.user import User, UserRole
 from coffeeapp.models.product import Product
 from coffeeapp.schemas.product import ProductCreate, ProductUpdate, Product as ProductSchema
 
 router = APIRouter()
 
+product_adapter = TypeAdapter(ProductSchema)
+
 @router.post("/product", response_model=ProductSchema)
-def create_product(
+async def create_product(
     product_in: ProductCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Создание нового продукта"""
@@ -21,26 +30,47 @@ def create_product(
     
     product = Product(**product_in.dict())
     db.add(product)
-    db.commit()
-    db.refresh(product)
+    await db.commit()
+    await db.refresh(product)
+    await invalidate_menu(db)
     return product
 
 @router.get("/products", response_model=List[ProductSchema])
-def get_products(
-    db: Session = Depends(get_db),
+async def get_products(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
-    search: Optional[str] = Query(None, description="Поиск по названию"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (заголовок X-Next-Cursor)"),
+    search: Optional[str] = Query(None, description="Поиск по названию (с префиксным совпадением слов)"),
+    search_description: bool = Query(False, description="Искать также по описанию"),
     category_id: Optional[int] = Query(None, description="Фильтр по категории"),
     min_price: Optional[float] = Query(None, description="Минимальная цена"),
     max_price: Optional[float] = Query(None, description="Максимальная цена"),
     sort_by: Optional[str] = Query(None, description="Сортировка (name, price)")
 ):
     """Получение списка продуктов с фильтрацией, сортировкой и пагинацией"""
-    query = db.query(Product)
+    cache_key = menu_cache_key(
+        "products",
+        skip=None if cursor else skip,
+        limit=limit,
+        cursor=cursor,
+        search=normalize_search(search),
+        search_description=search_description if search else None,
+        category_id=category_id or None,
+        min_price=min_price or None,
+        max_price=max_price or None,
+        sort_by=sort_by if sort_by in ("name", "price") else None
+    )
+    response = cached_menu_response(request, cache_key)
+    if response is not None:
+        return response
+    
+    query = select_products()
     
+    rank = None
     if search:
-        query = query.filter(Product.name.ilike(f"%{search}%"))
+        query, rank = search_products(query, search, search_description)
     if category_id:
         query = query.filter(Product.category_id == category_id)
     if min_price:
@@ -48,81 +78,109 @@ def get_products(
     if max_price:
         query = query.filter(Product.price <= max_price)
     
-    if sort_by:
-        if sort_by == "name":
-            query = query.order_by(Product.name)
-        elif sort_by == "price":
-            query = query.order_by(Product.price)
+    # Сортировка всегда дополняется id, чтобы порядок был однозначным
+    order_columns = [Product.id]
+    if sort_by == "name":
+        order_columns = [Product.name, Product.id]
+    elif sort_by == "price":
+        order_columns = [Product.price, Product.id]
     
-    products = query.offset(skip).limit(limit).all()
-    return products
+    if rank is not None and sort_by not in ("name", "price"):
+        # Результаты поиска упорядочены по релевантности и листаются через skip
+        query = query.order_by(rank, Product.id).offset(skip).limit(limit)
+        products = (await db.execute(query)).all()
+        next_page = None
+    else:
+        products = (await db.execute(paginate(query, order_columns, cursor, skip, limit))).all()
+        next_page = next_cursor(products, order_columns, limit)
+    
+    entry = make_entry(dump_rows(products), next_page)
+    menu_cache.set(cache_key, entry)
+    return menu_response(cache_key, entry)
 
 @router.get("/product/{product_id}", response_model=ProductSchema)
-def get_product(product_id: int, db: Session = Depends(get_db)):
+async def get_product(product_id: int, request: Request, db: AsyncSession = Depends(get_db)):
     """Получение продукта по ID"""
-    product = db.query(Product).filter(Product.id == product_id).first()
+    cache_key = menu_cache_key("product", id=product_id)
+    response = cached_menu_response(request, cache_key)
+    if response is not None:
+        return response
+    
+    product = await db.scalar(select(Product).filter(Product.id == product_id))
     if not product:
         raise HTTPException(status_code=404, detail="Продукт не найден")
-    return product
+    entry = make_entry(dump_json(product_adapter, product))
+    menu_cache.set(cache_key, entry)
+    return menu_response(cache_key, entry)
 
 @router.put("/product/{product_id}", response_model=ProductSchema)
-def update_product(
+async def update_product(
     product_id: int,
     product_in: ProductUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Обновление продукта"""
     if not current_user.is_superuser:
         raise HTTPException(status_code=403, detail="Недостаточно прав")
     
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.scalar(select(Product).filter(Product.id == product_id))
     if not product:
         raise HTTPException(status_code=404, detail="Продукт не найден")
     
     for field, value in product_in.dict(exclude_unset=True).items():
         setattr(product, field, value)
     
-    db.commit()
-    db.refresh(product)
+    await db.commit()
+    await db.refresh(product)
+    await invalidate_menu(db)
     return product
 
 @router.patch("/product/{product_id}", response_model=ProductSchema)
-def patch_product(
+async def patch_product(
     product_id: int,
     product_in: ProductUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Частичное обновление продукта"""
     if not current_user.is_superuser:
         raise HTTPException(status_code=403, detail="Недостаточно прав")
     
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.scalar(select(Product).filter(Product.id == product_id))
     if not product:
         raise HTTPException(status_code=404, detail="Продукт не найден")
     
     for field, value in product_in.dict(exclude_unset=True).items():
         setattr(product, field, value)
     
-    db.commit()
-    db.refresh(product)
+    await db.commit()
+    await db.refresh(product)
+    await invalidate_menu(db)
     return product
 
 @router.delete("/product/{product_id}")
-def delete_product(
+async def delete_product(
     product_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Удаление продукта"""
     if not current_user.is_superuser:
         raise HTTPException(status_code=403, detail="Недостаточно прав")
     
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.scalar(select(Product).filter(Product.id == product_id))
     if not product:
         raise HTTPException(status_code=404, detail="Продукт не найден")
     
-    db.delete(product)
-    db.commit()
-    return {"message": "Продукт успешно удален"} 
\ No newline at end of file
+    await db.delete(product)
+    await db.commit()
+    await invalidate_menu(db)
+    return {"message": "Продукт успешно удален"}
+
+@router.get("/menu-cache/stats")
+async def get_menu_cache_stats(current_user: User = Depends(get_current_user)):
+    """Статистика попаданий в кэш меню"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Недостаточно прав")
+    return menu_cache.stats()
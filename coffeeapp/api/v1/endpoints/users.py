@@ -1,14 +1,18 @@
+from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from coffeeapp.core.responses import rows_response
+from coffeeapp.db.readonly import select_users
 from coffeeapp.db.session import get_db
 from coffeeapp.models.user import User
 from coffeeapp.core.dependencies import get_current_user
+from coffeeapp.schemas.user import UserInDB
 
 router = APIRouter()
 
-@router.get("/")
+@router.get("/", response_model=List[UserInDB])
 async def get_users(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     # Проверка, является ли текущий пользователь администратором
@@ -18,5 +22,5 @@ async def get_users(
             detail="Недостаточно прав для доступа к этому ресурсу"
         )
     print(current_user)
-    users = db.query(User).all()
-    return users    
\ No newline at end of file
+    users = (await db.execute(select_users())).all()
+    return rows_response(users)    
\ No newline at end of file
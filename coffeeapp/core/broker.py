@@ -0,0 +1,78 @@
+import asyncio
+from typing import AsyncIterator, List, Tuple
+from coffeeapp.core.config import settings
+
+class Broker:
+    """
+    Интерфейс pub/sub-брокера для рассылки сообщений между воркерами.
+    Сообщения одного канала доставляются подписчикам в порядке публикации.
+    """
+
+    async def publish(self, channel: str, message: str) -> None:
+        raise NotImplementedError
+
+    async def subscribe(self) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Подписка на все каналы. Возвращает поток пар (канал, сообщение)
+        только после того, как подписка действительно оформлена.
+        """
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+class MemoryBroker(Broker):
+    """Брокер в памяти процесса (один воркер)"""
+
+    def __init__(self):
+        self._subscribers: List[asyncio.Queue] = []
+
+    async def publish(self, channel, message):
+        for queue in self._subscribers:
+            queue.put_nowait((channel, message))
+
+    async def subscribe(self):
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.append(queue)
+        return self._iterate(queue)
+
+    async def _iterate(self, queue: asyncio.Queue):
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers.remove(queue)
+
+class RedisBroker(Broker):
+    """Брокер поверх Redis pub/sub для нескольких воркеров и узлов"""
+
+    def __init__(self, url: str, prefix: str = "chat:"):
+        import redis.asyncio as redis
+
+        self.prefix = prefix
+        self._redis = redis.from_url(url, decode_responses=True)
+
+    async def publish(self, channel, message):
+        await self._redis.publish(self.prefix + channel, message)
+
+    async def subscribe(self):
+        pubsub = self._redis.pubsub()
+        await pubsub.psubscribe(self.prefix + "*")
+        return self._iterate(pubsub)
+
+    async def _iterate(self, pubsub):
+        try:
+            async for item in pubsub.listen():
+                if item["type"] == "pmessage":
+                    yield item["channel"][len(self.prefix):], item["data"]
+        finally:
+            await pubsub.aclose()
+
+    async def close(self):
+        await self._redis.aclose()
+
+def create_broker(url: str = settings.CHAT_BROKER_URL, prefix: str = "chat:") -> Broker:
+    """prefix разделяет потоки в Redis: у каждого подписчика свое пространство каналов"""
+    if url.startswith(("redis://", "rediss://")):
+        return RedisBroker(url, prefix)
+    return MemoryBroker()
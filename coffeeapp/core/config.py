@@ -10,10 +10,58 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str = "postgres"
     POSTGRES_DB: str = "coffee_shop"
     
+    # Подключение к БД (asyncpg для PostgreSQL, aiosqlite для локального запуска)
+    DATABASE_URL: str = "sqlite+aiosqlite:///./coffee_shop.db"
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800  # секунды
+    
     JWT_SECRET_KEY: str = "hikamoruru"  # в продакшене использовать безопасный ключ
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # Кэш аутентифицированных пользователей (по subject токена)
+    PRINCIPAL_CACHE_TTL: int = 60  # секунды
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    
+    # Хэширование паролей
+    BCRYPT_ROUNDS: int = 12  # при увеличении старые хэши пересчитываются при входе
+    PASSWORD_HASH_WORKERS: int = 4  # максимум одновременных операций bcrypt
+    PASSWORD_HASH_EXECUTOR: str = "thread"  # thread или process
+    
+    # Кэш меню (продукты и категории)
+    MENU_CACHE_TTL: int = 300  # секунды, ограничивает устаревание, если сброс через брокер не дошел
+    MENU_CACHE_SIZE: int = 1024
+    
+    # Брокер чата: memory:// (один воркер) или redis://host:6379/0
+    CHAT_BROKER_URL: str = "memory://"
+    CHAT_SEND_QUEUE_SIZE: int = 100  # исходящих сообщений на одно соединение
+    CHAT_SLOW_CONSUMER_POLICY: str = "disconnect"  # disconnect или drop (старые сообщения)
+    CHAT_PRESENCE_INTERVAL: float = 15.0  # секунды между рассылками списка присутствия воркера
+    
+    # История чата: отложенная пакетная запись и догрузка при переподключении
+    CHAT_HISTORY_BATCH_SIZE: int = 500
+    CHAT_HISTORY_FLUSH_INTERVAL: float = 0.5  # секунды
+    CHAT_HISTORY_REPLAY_LIMIT: int = 200  # сообщений при переподключении, дальше - REST
+    SNOWFLAKE_LEASE_TTL: int = 60  # секунды аренды номера воркера для id сообщений
+    
+    # Очистка неверифицированных пользователей
+    CLEANUP_BATCH_SIZE: int = 1000  # пользователей на транзакцию
+    
+    # Планировщик: задания выполняет только воркер-лидер
+    SCHEDULER_LEASE_TTL: int = 30  # секунды
+    SCHEDULER_SHUTDOWN_TIMEOUT: float = 30  # секунды на завершение текущих заданий
+    
+    # Фоновые задачи (таблица background_tasks)
+    TASK_WORKERS: int = 2  # воркеров очереди в каждом процессе
+    TASK_POLL_INTERVAL: float = 1.0  # секунды между проверками пустой очереди
+    TASK_MAX_ATTEMPTS: int = 5
+    TASK_RETRY_BASE_DELAY: float = 5.0  # секунды, удваивается с каждой попыткой
+    TASK_RETRY_MAX_DELAY: float = 600.0
+    TASK_LOCK_TIMEOUT: int = 300  # секунды, после которых задача упавшего процесса берется снова
+    TASK_SHUTDOWN_TIMEOUT: float = 30
+    
     # Добавляем новые настройки
     FRONTEND_HOST: str = "http://localhost:3000"  # URL фронтенда
     ALLOWED_HOSTS: str = "*"  # Изменено с list на str
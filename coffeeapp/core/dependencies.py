@@ -1,15 +1,32 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from coffeeapp.core.cache import Cache, MemoryCacheBackend
 from coffeeapp.core.config import settings
+from coffeeapp.core.invalidation import cache_invalidation
 from coffeeapp.db.session import get_db
 from coffeeapp.models.user import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/authentication")
 
+# Кэш пользователей по email (subject токена), хранит только значения колонок
+principal_cache = Cache(
+    MemoryCacheBackend(
+        maxsize=settings.PRINCIPAL_CACHE_SIZE,
+        ttl=settings.PRINCIPAL_CACHE_TTL
+    )
+)
+
+cache_invalidation.register("principal", principal_cache.invalidate)
+
+async def invalidate_principal(email: str) -> None:
+    """Сброс закэшированного пользователя на всех воркерах после изменения его записи"""
+    await cache_invalidation.publish("principal", email)
+
 async def get_current_user(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     token: str = Depends(oauth2_scheme)
 ) -> User:
     credentials_exception = HTTPException(
@@ -29,7 +46,15 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
         
-    user = db.query(User).filter(User.email == email).first()
+    cached = principal_cache.get(email)
+    if cached is not None:
+        return User(**cached)
+    
+    user = await db.scalar(select(User).filter(User.email == email))
     if user is None:
         raise credentials_exception
+    principal_cache.set(
+        email,
+        {column.key: getattr(user, column.key) for column in User.__table__.columns}
+    )
     return user 
\ No newline at end of file
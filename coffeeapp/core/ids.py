@@ -0,0 +1,148 @@
+import asyncio
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import select, update
+from coffeeapp.core.config import settings
+from coffeeapp.db.session import SessionLocal
+from coffeeapp.db.upsert import upsert
+from coffeeapp.models.worker import WorkerIdLease
+
+# Начало отсчета времени в идентификаторах (2024-01-01 UTC), миллисекунды
+EPOCH_MS = 1704067200000
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+
+class SnowflakeGenerator:
+    """
+    Монотонные 63-битные идентификаторы без обращения к БД:
+    время в миллисекундах, номер воркера и счетчик внутри миллисекунды.
+    Сортировка по id совпадает с порядком создания с точностью до миллисекунды.
+    Номера воркеров должны быть уникальны - их выдает WorkerIdService.
+    """
+
+    def __init__(self, worker_id: Optional[int] = None):
+        self.worker_id = worker_id
+        self._last_ms = -1
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def assign(self, worker_id: Optional[int]):
+        with self._lock:
+            self.worker_id = worker_id
+
+    def next_id(self) -> int:
+        with self._lock:
+            if self.worker_id is None:
+                raise RuntimeError("Snowflake worker id is not assigned")
+            now = max(int(time.time() * 1000), self._last_ms)
+            if now == self._last_ms:
+                self._sequence = (self._sequence + 1) & ((1 << SEQUENCE_BITS) - 1)
+                if self._sequence == 0:
+                    # Счетчик исчерпан - ждем следующую миллисекунду
+                    while now <= self._last_ms:
+                        now = int(time.time() * 1000)
+            else:
+                self._sequence = 0
+            self._last_ms = now
+            return (
+                ((now - EPOCH_MS) << (WORKER_BITS + SEQUENCE_BITS))
+                | (self.worker_id << SEQUENCE_BITS)
+                | self._sequence
+            )
+
+class WorkerIdService:
+    """
+    Номер воркера из таблицы snowflake_workers: свободный или с истекшей арендой.
+    Аренда продлевается каждые ttl/3 секунд. Если продлить ее не удалось до
+    истечения, генератор перестает выдавать id, пока не получит новый номер.
+    При остановке аренда не освобождается: номер снова выдается только через ttl,
+    поэтому id старого и нового владельца не пересекаются даже при расхождении часов.
+    """
+
+    def __init__(self, generator: SnowflakeGenerator, ttl: int):
+        self.generator = generator
+        self.ttl = ttl
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.worker_id: Optional[int] = None
+        self.expires_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        await self.acquire()
+        self._task = asyncio.create_task(self._run())
+
+    async def acquire(self):
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl)
+        async with SessionLocal() as db:
+            taken = dict((await db.execute(
+                select(WorkerIdLease.worker_id, WorkerIdLease.expires_at)
+            )).all())
+            candidates = [n for n in range(1 << WORKER_BITS) if n not in taken]
+            candidates += sorted((n for n in taken if taken[n] < now), key=taken.get)
+            for worker_id in candidates:
+                # Конкурент мог занять номер между выборкой и захватом - тогда берем следующий
+                if worker_id in taken:
+                    stmt = (
+                        update(WorkerIdLease)
+                        .where(WorkerIdLease.worker_id == worker_id, WorkerIdLease.expires_at < now)
+                        .values(owner=self.owner, expires_at=expires_at)
+                    )
+                else:
+                    stmt = (
+                        upsert(WorkerIdLease)
+                        .values(worker_id=worker_id, owner=self.owner, expires_at=expires_at)
+                        .on_conflict_do_nothing(index_elements=[WorkerIdLease.worker_id])
+                    )
+                result = await db.execute(stmt)
+                await db.commit()
+                if result.rowcount == 1:
+                    self.worker_id = worker_id
+                    self.expires_at = expires_at
+                    self.generator.assign(worker_id)
+                    print(f"Snowflake worker id: {worker_id}")
+                    return
+        raise RuntimeError("No free snowflake worker id")
+
+    async def renew(self) -> bool:
+        expires_at = datetime.utcnow() + timedelta(seconds=self.ttl)
+        async with SessionLocal() as db:
+            result = await db.execute(
+                update(WorkerIdLease)
+                .where(WorkerIdLease.worker_id == self.worker_id, WorkerIdLease.owner == self.owner)
+                .values(expires_at=expires_at)
+            )
+            await db.commit()
+        if result.rowcount == 1:
+            self.expires_at = expires_at
+            return True
+        return False
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.ttl / 3)
+            try:
+                if self.worker_id is None or not await self.renew():
+                    print(f"Snowflake worker id {self.worker_id} lost")
+                    self.worker_id = None
+                    self.generator.assign(None)
+                    await self.acquire()
+            except Exception as e:
+                print(f"Snowflake worker id lease error: {e}")
+                if self.worker_id is not None and datetime.utcnow() >= self.expires_at:
+                    # Номер может быть уже выдан другому воркеру
+                    self.worker_id = None
+                    self.generator.assign(None)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+snowflake = SnowflakeGenerator()
+worker_ids = WorkerIdService(snowflake, settings.SNOWFLAKE_LEASE_TTL)
@@ -0,0 +1,55 @@
+import asyncio
+import json
+import uuid
+from typing import Callable, Dict, Optional
+from coffeeapp.core.broker import Broker, create_broker
+
+class CacheInvalidation:
+    """
+    Сброс локальных кэшей на всех воркерах через брокер.
+    Воркер-инициатор сбрасывает свой кэш сразу, остальные - по событию из канала.
+    """
+
+    def __init__(self, broker: Broker):
+        self.broker = broker
+        self.origin = uuid.uuid4().hex
+        self.handlers: Dict[str, Callable[[str], None]] = {}
+        self._listener: Optional[asyncio.Task] = None
+
+    def register(self, kind: str, handler: Callable[[str], None]):
+        """handler(key) сбрасывает локальный кэш вида kind"""
+        self.handlers[kind] = handler
+
+    async def start(self):
+        if self._listener is None:
+            messages = await self.broker.subscribe()
+            self._listener = asyncio.create_task(self._listen(messages))
+
+    async def publish(self, kind: str, key: str = ""):
+        self.handlers[kind](key)
+        try:
+            await self.broker.publish(kind, json.dumps({"origin": self.origin, "key": key}))
+        except Exception as e:
+            # Кэши других воркеров устареют не дольше, чем на свой TTL
+            print(f"Cache invalidation publish error: {e}")
+
+    async def _listen(self, messages):
+        async for kind, message in messages:
+            handler = self.handlers.get(kind)
+            if handler is None:
+                continue
+            event = json.loads(message)
+            if event["origin"] == self.origin:
+                continue
+            try:
+                handler(event["key"])
+            except Exception as e:
+                print(f"Cache invalidation error: {e}")
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        await self.broker.close()
+
+cache_invalidation = CacheInvalidation(create_broker(prefix="cache:"))
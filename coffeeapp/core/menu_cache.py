@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Hashable, Optional, Tuple
+from fastapi import Request
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from coffeeapp.core.cache import Cache, MemoryCacheBackend
+from coffeeapp.core.config import settings
+from coffeeapp.core.invalidation import cache_invalidation
+from coffeeapp.core.pagination import NEXT_CURSOR_HEADER
+from coffeeapp.core.responses import FastJSONResponse
+from coffeeapp.db.session import SessionLocal
+from coffeeapp.models.menu import MenuState
+
+# Кэш сериализованных ответов меню (продукты и категории): (тело, курсор)
+menu_cache = Cache(
+    MemoryCacheBackend(
+        maxsize=settings.MENU_CACHE_SIZE,
+        ttl=settings.MENU_CACHE_TTL
+    )
+)
+
+class MenuVersion:
+    """
+    Версия меню из таблицы menu_state, увеличивается при каждом изменении продуктов
+    или категорий. Общая для всех воркеров и переживает перезапуски: новое значение
+    приходит вместе со сбросом кэша, а раз в MENU_CACHE_TTL перечитывается из БД
+    на случай, если сброс через брокер не дошел.
+    """
+
+    def __init__(self):
+        self.value = 0
+        self.last_modified = datetime(1970, 1, 1, tzinfo=timezone.utc)
+        self._task: Optional[asyncio.Task] = None
+
+    def adopt(self, value: int, changed_at: datetime) -> None:
+        """Переход на более новую версию (события могут прийти не по порядку)"""
+        if value >= self.value:
+            self.value = value
+            self.last_modified = changed_at.replace(tzinfo=timezone.utc, microsecond=0)
+
+    async def load(self) -> None:
+        async with SessionLocal() as db:
+            state = (await db.execute(
+                select(MenuState.version, MenuState.changed_at).filter(MenuState.id == 1)
+            )).first()
+        if state is not None:
+            self.adopt(state.version, state.changed_at)
+
+    async def bump(self, db: Optional[AsyncSession] = None) -> Tuple[int, datetime]:
+        """
+        Увеличение версии через сессию запроса: отдельная сессия заняла бы второе
+        соединение пула и при параллельных изменениях меню пул исчерпывается
+        """
+        if db is None:
+            async with SessionLocal() as db:
+                return await self.bump(db)
+        changed_at = datetime.utcnow().replace(microsecond=0)
+        value = await db.scalar(
+            update(MenuState)
+            .where(MenuState.id == 1)
+            .values(version=MenuState.version + 1, changed_at=changed_at)
+            .returning(MenuState.version)
+        )
+        await db.commit()
+        self.adopt(value, changed_at)
+        return value, changed_at
+
+    async def start(self):
+        await self.load()
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.MENU_CACHE_TTL)
+            try:
+                await self.load()
+            except Exception as e:
+                print(f"Menu version refresh error: {e}")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+menu_version = MenuVersion()
+
+def menu_cache_key(namespace: str, **params: Any) -> Hashable:
+    """Ключ кэша из версии меню и нормализованных параметров запроса"""
+    normalized = [(name, value) for name, value in sorted(params.items()) if value is not None]
+    return (namespace, menu_version.value, *normalized)
+
+def normalize_search(search: Optional[str]) -> Optional[str]:
+    """Поиск регистронезависимый, поэтому в ключе кэша используется нижний регистр"""
+    return search.lower() if search else None
+
+def dump_json(adapter: TypeAdapter, obj: Any) -> bytes:
+    """Сериализация ORM-объектов через схему ответа"""
+    return adapter.dump_json(adapter.validate_python(obj, from_attributes=True))
+
+def make_entry(body: bytes, next_cursor: Optional[str] = None) -> Tuple[bytes, Optional[str]]:
+    """Запись кэша: тело ответа и курсор следующей страницы"""
+    return body, next_cursor
+
+def menu_etag(key: Hashable) -> str:
+    """Сильный ETag из ключа кэша (в нем версия меню): одинаков на всех воркерах и считается без БД"""
+    return '"%s"' % hashlib.sha1(repr(key).encode()).hexdigest()
+
+def validators(key: Hashable) -> dict:
+    return {
+        "ETag": menu_etag(key),
+        "Last-Modified": format_datetime(menu_version.last_modified, usegmt=True),
+    }
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+def not_modified_since(if_modified_since: Optional[str]) -> bool:
+    if not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return menu_version.last_modified <= since
+
+def cached_menu_response(request: Request, key: Hashable) -> Optional[Response]:
+    """
+    304 по If-None-Match (или If-Modified-Since, если ETag не прислан) без обращения
+    к кэшу и БД; иначе ответ из кэша; None - ответ нужно построить.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        not_modified = etag_matches(if_none_match, menu_etag(key))
+    else:
+        not_modified = not_modified_since(request.headers.get("if-modified-since"))
+    if not_modified:
+        return Response(status_code=304, headers=validators(key))
+    entry = menu_cache.get(key)
+    if entry is not None:
+        return menu_response(key, entry)
+    return None
+
+def menu_response(key: Hashable, entry: Tuple[bytes, Optional[str]]) -> Response:
+    body, next_cursor = entry
+    headers = validators(key)
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    return FastJSONResponse(body, headers=headers)
+
+def reset_menu(key: str) -> None:
+    """Новая версия меню ("версия:время изменения") и сброс локального кэша"""
+    value, changed_at = key.split(":", 1)
+    menu_version.adopt(int(value), datetime.fromisoformat(changed_at))
+    menu_cache.clear()
+
+cache_invalidation.register("menu", reset_menu)
+
+async def invalidate_menu(db: Optional[AsyncSession] = None) -> None:
+    """Новая версия меню в БД и сброс кэша на всех воркерах после изменения продуктов или категорий"""
+    value, changed_at = await menu_version.bump(db)
+    await cache_invalidation.publish("menu", f"{value}:{changed_at.isoformat()}")
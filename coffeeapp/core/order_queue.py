@@ -0,0 +1,90 @@
+import json
+import orjson
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select
+
+from coffeeapp.db.loading import ORDER_ITEMS
+from coffeeapp.db.session import SessionLocal
+from coffeeapp.models.order import ACTIVE_ORDERS_WHERE, Order, OrderStatus
+from coffeeapp.schemas.order import Order as OrderSchema
+
+# Заказы, которые еще должен увидеть бариста
+ACTIVE_STATUSES = (OrderStatus.PENDING, OrderStatus.CONFIRMED, OrderStatus.PREPARING)
+ACTIVE_STATUS_VALUES = frozenset(status.value for status in ACTIVE_STATUSES)
+
+class ActiveOrderQueue:
+    """
+    Индекс открытых заказов в памяти воркера, отсортированный по (created_at, id).
+    Обновляется инкрементально событиями заказов; каждый заказ хранится
+    уже сериализованным, а тело ответа собирается заново только после изменений.
+    """
+
+    def __init__(self):
+        self._orders: Dict[int, Tuple[Tuple[str, int], bytes]] = {}
+        self._keys: List[Tuple[str, int]] = []
+        self._body: Optional[bytes] = None
+        # События, пришедшие во время rebuild(), применяются после загрузки
+        self._pending: Optional[List[dict]] = None
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def apply(self, order: dict):
+        """Заказ в формате OrderSchema (mode="json"): добавление, замена или удаление"""
+        if self._pending is not None:
+            self._pending.append(order)
+            return
+        self._remove(order["id"])
+        if order["status"] in ACTIVE_STATUS_VALUES:
+            key = (order["created_at"], order["id"])
+            insort(self._keys, key)
+            self._orders[order["id"]] = (key, orjson.dumps(order))
+        self._body = None
+
+    def apply_event(self, message: str):
+        """Событие заказа из брокера (в том числе от других воркеров)"""
+        self.apply(json.loads(message)["order"])
+
+    def _remove(self, order_id: int):
+        entry = self._orders.pop(order_id, None)
+        if entry is not None:
+            del self._keys[bisect_left(self._keys, entry[0])]
+
+    def body(self) -> bytes:
+        """JSON-массив открытых заказов от старых к новым"""
+        if self._body is None:
+            self._body = b"[" + b",".join(
+                self._orders[order_id][1] for _, order_id in self._keys
+            ) + b"]"
+        return self._body
+
+    async def rebuild(self):
+        """
+        Полная загрузка открытых заказов. Вызывается после подписки на брокер:
+        события, пришедшие во время загрузки, применяются поверх нее по порядку.
+        """
+        self._pending = []
+        try:
+            async with SessionLocal() as db:
+                orders = (await db.scalars(active_orders_query())).all()
+        finally:
+            pending, self._pending = self._pending, None
+        self._orders.clear()
+        self._keys.clear()
+        for order in orders:
+            self.apply(OrderSchema.model_validate(order).model_dump(mode="json"))
+        for order in pending:
+            self.apply(order)
+        self._body = None
+
+def active_orders_query():
+    """Открытые заказы по частичному индексу ix_orders_active_created"""
+    return (
+        select(Order)
+        .options(ORDER_ITEMS)
+        .filter(ACTIVE_ORDERS_WHERE)
+        .order_by(Order.created_at, Order.id)
+    )
+
+order_queue = ActiveOrderQueue()
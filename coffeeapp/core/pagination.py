@@ -0,0 +1,55 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+from fastapi import HTTPException
+from sqlalchemy import DateTime, Select, tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Непрозрачный курсор из значений ключа сортировки последней строки"""
+    raw = json.dumps(
+        [value.isoformat() if isinstance(value, datetime) else value for value in values],
+        separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, columns: Sequence[Any]) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError
+        return [
+            datetime.fromisoformat(value) if isinstance(column.type, DateTime) else value
+            for column, value in zip(columns, values)
+        ]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
+
+def paginate(
+    query: Select,
+    columns: Sequence[Any],
+    cursor: Optional[str],
+    skip: int,
+    limit: int,
+    descending: bool = False
+) -> Select:
+    """Keyset-пагинация по (ключ сортировки, id); без курсора - прежний offset"""
+    if descending:
+        query = query.order_by(*(column.desc() for column in columns))
+    else:
+        query = query.order_by(*columns)
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        key, after = tuple_(*columns), tuple_(*values)
+        return query.filter(key < after if descending else key > after).limit(limit)
+    return query.offset(skip).limit(limit)
+
+def next_cursor(rows: Sequence[Any], columns: Sequence[Any], limit: int) -> Optional[str]:
+    """Курсор следующей страницы или None, если страница последняя"""
+    if not rows or len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor([getattr(last, column.key) for column in columns])
@@ -0,0 +1,21 @@
+from typing import Any, Dict, Optional, Sequence
+import orjson
+from fastapi.responses import JSONResponse
+
+class FastJSONResponse(JSONResponse):
+    """
+    Класс ответа приложения по умолчанию: JSON через orjson (datetime, Enum и float -
+    без преобразований). bytes считаются уже сериализованным JSON (кэш меню, очередь заказов).
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+def dump_rows(rows: Sequence[Any]) -> bytes:
+    """Строки Core-запроса в JSON-массив: ключи - метки выбранных колонок"""
+    return orjson.dumps([row._asdict() for row in rows])
+
+def rows_response(rows: Sequence[Any], headers: Optional[Dict[str, str]] = None) -> FastJSONResponse:
+    return FastJSONResponse([row._asdict() for row in rows], headers=headers)
@@ -1,7 +1,203 @@
+import asyncio
+import os
+import socket
+import time
+import traceback
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Set
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from coffeeapp.core.config import settings
+from coffeeapp.db.session import SessionLocal
+from coffeeapp.db.upsert import upsert
+from coffeeapp.models.scheduler import JobRun, SchedulerJob, SchedulerLease
 from coffeeapp.tasks.cleanup import cleanup_unverified_users
 
+# Задания планировщика: id -> (функция, параметры триггера interval)
+JOBS = {
+    "cleanup_unverified_users": (cleanup_unverified_users, {"hours": 24}),
+}
+
+LEASE_NAME = "scheduler"
+
 def setup_scheduler():
-    scheduler = AsyncIOScheduler()
-    scheduler.add_job(cleanup_unverified_users, 'interval', hours=24)
-    return scheduler 
\ No newline at end of file
+    scheduler = AsyncIOScheduler(
+        # Пропущенные за время простоя или смены лидера запуски выполняются один раз,
+        # как бы давно они ни были запланированы (без ограничения grace time)
+        job_defaults={"coalesce": True, "max_instances": 1, "misfire_grace_time": None}
+    )
+    return scheduler
+
+async def save_next_run(db: AsyncSession, job_id: str, next_run_time: Optional[datetime]):
+    """Время следующего запуска хранится в БД, чтобы его не сдвигали перезапуски и смена лидера"""
+    next_run_at = next_run_time.astimezone(timezone.utc).replace(tzinfo=None) if next_run_time else None
+    stmt = upsert(SchedulerJob).values(id=job_id, next_run_at=next_run_at)
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[SchedulerJob.id],
+        set_={"next_run_at": stmt.excluded.next_run_at}
+    ))
+
+class LeaderLease:
+    """
+    Аренда лидерства в таблице scheduler_leases (работает и на SQLite, и на PostgreSQL).
+    Владелец продлевает аренду каждые ttl/3 секунд; если он пропал,
+    после истечения ttl аренду забирает другой воркер.
+    Часы воркеров должны расходиться намного меньше, чем на ttl.
+    """
+
+    def __init__(self, name: str, ttl: int):
+        self.name = name
+        self.ttl = ttl
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    async def acquire(self) -> bool:
+        """Захват или продление аренды; True - этот воркер лидер"""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl)
+        async with SessionLocal() as db:
+            result = await db.execute(
+                update(SchedulerLease)
+                .where(
+                    SchedulerLease.name == self.name,
+                    or_(SchedulerLease.owner == self.owner, SchedulerLease.expires_at < now)
+                )
+                .values(owner=self.owner, expires_at=expires_at)
+            )
+            if result.rowcount == 0:
+                result = await db.execute(
+                    upsert(SchedulerLease)
+                    .values(name=self.name, owner=self.owner, expires_at=expires_at)
+                    .on_conflict_do_nothing(index_elements=[SchedulerLease.name])
+                )
+            await db.commit()
+            return result.rowcount == 1
+
+    async def release(self):
+        async with SessionLocal() as db:
+            await db.execute(
+                update(SchedulerLease)
+                .where(SchedulerLease.name == self.name, SchedulerLease.owner == self.owner)
+                .values(expires_at=datetime.utcnow())
+            )
+            await db.commit()
+
+class SchedulerService:
+    """
+    Планировщик, работающий только в воркере-лидере.
+    Каждый воркер периодически пытается получить аренду; лидер запускает
+    APScheduler с общим хранилищем заданий в БД, остальные ждут.
+    """
+
+    def __init__(self, lease: LeaderLease):
+        self.lease = lease
+        self.scheduler: Optional[AsyncIOScheduler] = None
+        self.is_leader = False
+        self._campaign: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+
+    async def start(self):
+        self._campaign = asyncio.create_task(self._run_campaign())
+
+    async def _run_campaign(self):
+        while True:
+            try:
+                self.is_leader = await self.lease.acquire()
+            except Exception as e:
+                print(f"Scheduler lease error: {e}")
+                self.is_leader = False
+            if self.is_leader and self.scheduler is None:
+                print(f"Scheduler leader: {self.lease.owner}")
+                try:
+                    await self._start_scheduler()
+                except Exception as e:
+                    # Повторим при следующем продлении аренды
+                    print(f"Scheduler start error: {e}")
+            elif not self.is_leader and self.scheduler is not None:
+                print(f"Scheduler leadership lost: {self.lease.owner}")
+                self._stop_scheduler()
+            await asyncio.sleep(self.lease.ttl / 3)
+
+    async def _start_scheduler(self):
+        async with SessionLocal() as db:
+            stored = dict((await db.execute(select(SchedulerJob.id, SchedulerJob.next_run_at))).all())
+            scheduler = setup_scheduler()
+            scheduler.start(paused=True)
+            for job_id, (_, trigger_args) in JOBS.items():
+                options = {}
+                if stored.get(job_id) is not None:
+                    # Продолжаем прежнее расписание вместо отсчета интервала от перезапуска
+                    options["next_run_time"] = stored[job_id].replace(tzinfo=timezone.utc)
+                job = scheduler.add_job(
+                    run_job, "interval", args=[job_id], id=job_id, **trigger_args, **options
+                )
+                await save_next_run(db, job_id, job.next_run_time)
+            await db.commit()
+        scheduler.resume()
+        self.scheduler = scheduler
+
+    def _stop_scheduler(self):
+        self.scheduler.shutdown(wait=False)
+        self.scheduler = None
+
+    async def stop(self, timeout: float = settings.SCHEDULER_SHUTDOWN_TIMEOUT):
+        """Остановка при выключении: новые запуски запрещены, текущие дорабатывают до timeout"""
+        if self._campaign is not None:
+            self._campaign.cancel()
+            self._campaign = None
+        if self.scheduler is not None:
+            self._stop_scheduler()
+        if self._running:
+            _, pending = await asyncio.wait(self._running, timeout=timeout)
+            for task in pending:
+                task.cancel()
+        if self.is_leader:
+            # Освобождаем аренду сразу, чтобы другой воркер не ждал ее истечения
+            self.is_leader = False
+            try:
+                await self.lease.release()
+            except Exception as e:
+                print(f"Scheduler lease release error: {e}")
+
+scheduler_service = SchedulerService(LeaderLease(LEASE_NAME, settings.SCHEDULER_LEASE_TTL))
+
+async def run_job(job_id: str):
+    """Запуск задания из APScheduler: проверка лидерства и запись истории с длительностью"""
+    if not scheduler_service.is_leader:
+        print(f"Job {job_id} skipped: not a leader")
+        return
+    func, _ = JOBS[job_id]
+
+    async with SessionLocal() as db:
+        run = JobRun(
+            job_id=job_id,
+            owner=scheduler_service.lease.owner,
+            started_at=datetime.utcnow(),
+            status="running"
+        )
+        db.add(run)
+        await db.commit()
+
+        started = time.perf_counter()
+        task = asyncio.current_task()
+        scheduler_service._running.add(task)
+        try:
+            result = await func()
+            if isinstance(result, dict):
+                run.metrics = result
+            run.status = "success"
+        except BaseException as e:
+            run.status = "error"
+            run.error = "".join(traceback.format_exception(e))
+            print(f"Job {job_id} failed: {e}")
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            scheduler_service._running.discard(task)
+            run.finished_at = datetime.utcnow()
+            run.duration = time.perf_counter() - started
+            job = scheduler_service.scheduler.get_job(job_id) if scheduler_service.scheduler else None
+            if job is not None:
+                await save_next_run(db, job_id, job.next_run_time)
+            await asyncio.shield(db.commit())
@@ -1,21 +1,99 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from functools import lru_cache
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from coffeeapp.core.config import settings
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
 from fastapi.responses import JSONResponse
+from starlette.datastructures import QueryParams
+from starlette.types import ASGIApp, Receive, Scope, Send
+import asyncio
 import re
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS
+)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Проверка пароля; второй элемент - новый хэш, если изменились параметры pwd_context"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+class PasswordHasher:
+    """Выполнение bcrypt в отдельном пуле, чтобы не блокировать event loop"""
+
+    def __init__(self, workers: int, use_processes: bool = False):
+        self.workers = workers
+        self.use_processes = use_processes
+        self.queue_depth = 0  # запросы, ожидающие свободного воркера
+        self.in_progress = 0
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.use_processes:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    async def _run(self, func, *args):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+        
+        self.queue_depth += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queue_depth -= 1
+        
+        self.in_progress += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self.in_progress -= 1
+            self._semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return await self._run(verify_and_update_password, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "executor": "process" if self.use_processes else "thread",
+            "in_progress": self.in_progress,
+            "queue_depth": self.queue_depth,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        # Семафор привязан к event loop; после перезапуска создается заново
+        self._semaphore = None
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    use_processes=settings.PASSWORD_HASH_EXECUTOR == "process"
+)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -31,40 +109,58 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     )
     return encoded_jwt 
 
-class SecurityMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        # Базовые проверки безопасности
-        headers = {
-            "X-Content-Type-Options": "nosniff",
-            "X-Frame-Options": "DENY",
-            "X-XSS-Protection": "1; mode=block",
-        }
-        
-        response = await call_next(request)
-        
-        for key, value in headers.items():
-            response.headers[key] = value
-            
-        return response
-
-class SQLInjectionMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        # Простая проверка на SQL-инъекции
-        path = request.url.path
-        query_params = str(request.query_params)
+SQL_PATTERNS = [
+    r"(\%27)|(\')|(\-\-)|(\%23)|(#)",
+    r"((\%3D)|(=))[^\n]*((\%27)|(\')|(\-\-)|(\%3B)|(;))",
+    r"\w*((\%27)|(\'))((\%6F)|o|(\%4F))((\%72)|r|(\%52))",
+    r"((\%27)|(\'))union",
+]
+
+# Все шаблоны компилируются один раз в одно выражение
+SQL_PATTERN = re.compile("|".join(f"(?:{pattern})" for pattern in SQL_PATTERNS), re.IGNORECASE)
+
+@lru_cache(maxsize=4096)
+def is_suspicious_request(path: str, query_string: bytes) -> bool:
+    """Простая проверка на SQL-инъекции (результат кэшируется для повторяющихся запросов)"""
+    query_params = str(QueryParams(query_string))
+    return bool(SQL_PATTERN.search(path) or SQL_PATTERN.search(query_params))
+
+# Базовые заголовки безопасности, добавляются к каждому HTTP-ответу
+SECURITY_HEADERS = [
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+]
+SECURITY_HEADER_NAMES = {name for name, _ in SECURITY_HEADERS}
+
+class SecurityMiddleware:
+    """Проверка на SQL-инъекции и заголовки безопасности в одном ASGI middleware"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        sql_patterns = [
-            r"(\%27)|(\')|(\-\-)|(\%23)|(#)",
-            r"((\%3D)|(=))[^\n]*((\%27)|(\')|(\-\-)|(\%3B)|(;))",
-            r"\w*((\%27)|(\'))((\%6F)|o|(\%4F))((\%72)|r|(\%52))",
-            r"((\%27)|(\'))union",
-        ]
+        async def send_with_headers(message):
+            # Заголовки дописываются в http.response.start, тело не буферизуется
+            if message["type"] == "http.response.start":
+                headers = [
+                    (name, value) for name, value in message.get("headers", ())
+                    if name.lower() not in SECURITY_HEADER_NAMES
+                ]
+                headers.extend(SECURITY_HEADERS)
+                message["headers"] = headers
+            await send(message)
         
-        for pattern in sql_patterns:
-            if re.search(pattern, path, re.IGNORECASE) or re.search(pattern, query_params, re.IGNORECASE):
-                return JSONResponse(
-                    status_code=403,
-                    content={"detail": "Подозрительный запрос"}
-                )
+        if is_suspicious_request(scope["path"], scope["query_string"]):
+            response = JSONResponse(
+                status_code=403,
+                content={"detail": "Подозрительный запрос"}
+            )
+            await response(scope, receive, send_with_headers)
+            return
         
-        return await call_next(request) 
\ No newline at end of file
+        await self.app(scope, receive, send_with_headers)
@@ -0,0 +1,180 @@
+"""
+Фоновые задачи.
+
+Задача ставится через enqueue() в той же сессии, что и изменение данных,
+и фиксируется вместе с ним одним коммитом: после отката задачи нет,
+после коммита она не потеряется даже при падении процесса.
+Пул воркеров каждого процесса забирает готовые задачи из таблицы
+background_tasks; неудачные повторяются с экспоненциальной задержкой.
+Обработчики регистрируются декоратором @task (см. coffeeapp/tasks).
+"""
+import asyncio
+import os
+import random
+import socket
+import traceback
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from coffeeapp.core.config import settings
+from coffeeapp.db.session import SessionLocal
+from coffeeapp.db.upsert import upsert
+from coffeeapp.models.task import BackgroundTask, TaskStatus
+
+TASK_HANDLERS: Dict[str, Callable[[dict], Awaitable[Any]]] = {}
+
+class UnknownTaskError(Exception):
+    """Нет обработчика с таким именем: повтор не поможет"""
+
+def task(name: str):
+    """Регистрация обработчика задачи; обработчик получает payload"""
+    def decorator(func):
+        TASK_HANDLERS[name] = func
+        return func
+    return decorator
+
+async def enqueue(
+    db: AsyncSession,
+    name: str,
+    payload: dict,
+    idempotency_key: Optional[str] = None,
+    delay: float = 0,
+    max_attempts: int = settings.TASK_MAX_ATTEMPTS
+):
+    """
+    Постановка задачи в текущей транзакции (коммитит вызывающий).
+    Задача с уже существующим idempotency_key не добавляется повторно.
+    """
+    stmt = upsert(BackgroundTask).values(
+        name=name,
+        payload=payload,
+        idempotency_key=idempotency_key,
+        status=TaskStatus.PENDING,
+        attempts=0,
+        max_attempts=max_attempts,
+        run_at=datetime.utcnow() + timedelta(seconds=delay),
+        created_at=datetime.utcnow()
+    )
+    if idempotency_key is not None:
+        stmt = stmt.on_conflict_do_nothing(index_elements=[BackgroundTask.idempotency_key])
+    await db.execute(stmt)
+
+def retry_delay(attempts: int) -> float:
+    """Экспоненциальная задержка со случайной добавкой, чтобы повторы не шли пачкой"""
+    delay = min(settings.TASK_RETRY_BASE_DELAY * 2 ** (attempts - 1), settings.TASK_RETRY_MAX_DELAY)
+    return delay + random.uniform(0, settings.TASK_RETRY_BASE_DELAY)
+
+class TaskWorkerPool:
+    """
+    Воркеры процесса, забирающие задачи из БД. Захват атомарный, поэтому
+    пулы нескольких процессов не выполняют одну задачу дважды; задача
+    упавшего процесса снова становится доступна после TASK_LOCK_TIMEOUT.
+    """
+
+    def __init__(self, workers: int, poll_interval: float, lock_timeout: int):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lock_timeout = lock_timeout
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+
+    async def start(self):
+        # Событие создается в цикле запуска (приложение может перезапускаться в тестах)
+        self._stopping = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def _claim(self):
+        now = datetime.utcnow()
+        ready = or_(
+            and_(BackgroundTask.status == TaskStatus.PENDING, BackgroundTask.run_at <= now),
+            and_(BackgroundTask.status == TaskStatus.RUNNING, BackgroundTask.locked_until < now)
+        )
+        candidate = (
+            select(BackgroundTask.id)
+            .where(ready)
+            .order_by(BackgroundTask.run_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        async with SessionLocal() as db:
+            # Условие повторяется во внешнем UPDATE: конкурент, успевший первым, его сломает
+            row = (await db.execute(
+                update(BackgroundTask)
+                .where(BackgroundTask.id == candidate, ready)
+                .values(
+                    status=TaskStatus.RUNNING,
+                    attempts=BackgroundTask.attempts + 1,
+                    locked_by=self.owner,
+                    locked_until=now + timedelta(seconds=self.lock_timeout)
+                )
+                .returning(
+                    BackgroundTask.id,
+                    BackgroundTask.name,
+                    BackgroundTask.payload,
+                    BackgroundTask.attempts,
+                    BackgroundTask.max_attempts
+                )
+            )).first()
+            await db.commit()
+            return row
+
+    async def _work(self):
+        while not self._stopping.is_set():
+            try:
+                row = await self._claim()
+            except Exception as e:
+                print(f"Task claim error: {e}")
+                row = None
+            if row is None:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._execute(row)
+
+    async def _execute(self, row):
+        values = {"locked_by": None, "locked_until": None}
+        try:
+            handler = TASK_HANDLERS.get(row.name)
+            if handler is None:
+                raise UnknownTaskError(f"Unknown task: {row.name}")
+            await handler(row.payload)
+            values.update(status=TaskStatus.DONE, finished_at=datetime.utcnow())
+        except Exception as e:
+            print(f"Task {row.name} #{row.id} failed (attempt {row.attempts}): {e}")
+            values["last_error"] = "".join(traceback.format_exception(e))
+            if row.attempts < row.max_attempts and not isinstance(e, UnknownTaskError):
+                values.update(
+                    status=TaskStatus.PENDING,
+                    run_at=datetime.utcnow() + timedelta(seconds=retry_delay(row.attempts))
+                )
+            else:
+                values.update(status=TaskStatus.FAILED, finished_at=datetime.utcnow())
+
+        async with SessionLocal() as db:
+            await db.execute(
+                update(BackgroundTask)
+                .where(BackgroundTask.id == row.id, BackgroundTask.locked_by == self.owner)
+                .values(**values)
+            )
+            await db.commit()
+
+    async def stop(self, timeout: float = settings.TASK_SHUTDOWN_TIMEOUT):
+        """Новые задачи не берутся, текущие дорабатывают до timeout"""
+        self._stopping.set()
+        if self._tasks:
+            _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+            for worker in pending:
+                worker.cancel()
+        self._tasks = []
+
+task_workers = TaskWorkerPool(
+    workers=settings.TASK_WORKERS,
+    poll_interval=settings.TASK_POLL_INTERVAL,
+    lock_timeout=settings.TASK_LOCK_TIMEOUT
+)
@@ -0,0 +1,175 @@
+"""
+История чата.
+
+Сообщения пишутся отложенно: цикл приема WebSocket только кладет строку
+в буфер воркера, а фоновая задача вставляет накопленное одним пакетом
+(по размеру пакета или по таймеру). Поэтому в БД сообщение появляется
+с задержкой до CHAT_HISTORY_FLUSH_INTERVAL; догрузка при переподключении
+сначала сбрасывает буфер своего воркера.
+"""
+import asyncio
+from datetime import datetime
+from typing import Iterable, List, Optional
+from sqlalchemy import Select, and_, insert, or_, select
+from sqlalchemy.exc import DataError, IntegrityError, ProgrammingError
+
+from coffeeapp.core.config import settings
+from coffeeapp.db.session import SessionLocal
+from coffeeapp.models.chat import ChatMessage
+from coffeeapp.models.user import User
+
+# Ошибки самой строки (тип значения, внешний ключ, повтор id): повтор их не исправит
+ROW_ERRORS = (DataError, IntegrityError, ProgrammingError)
+
+def validate_row(row: dict):
+    """Проверка строки до буфера: одна неверная строка не должна ломать пакет"""
+    if not isinstance(row.get("id"), int) or not isinstance(row.get("sender_id"), int):
+        raise ValueError("Chat message id and sender_id must be int")
+    if not isinstance(row.get("room"), str) or not isinstance(row.get("text"), str):
+        raise ValueError("Chat message room and text must be str")
+    if row.get("recipient_id") is not None and not isinstance(row["recipient_id"], int):
+        raise ValueError("Chat message recipient_id must be int")
+    if not isinstance(row.get("created_at"), datetime):
+        raise ValueError("Chat message created_at must be datetime")
+
+class ChatHistoryWriter:
+    """Буфер сообщений воркера с пакетной вставкой в фоне"""
+
+    def __init__(self, batch_size: int, flush_interval: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # Не даем буферу расти бесконечно, если БД недоступна
+        self.max_buffer = batch_size * 20
+        self.buffer: List[dict] = []
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock = asyncio.Lock()
+        self._closing = False
+
+    async def start(self):
+        # Событие и задача создаются в цикле запуска (приложение может перезапускаться в тестах)
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+
+    def add(self, row: dict):
+        """Добавление без ожидания БД; неверная строка отклоняется сразу (ValueError)"""
+        validate_row(row)
+        self.buffer.append(row)
+        if len(self.buffer) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Chat history flush error: {e}")
+
+    async def flush(self):
+        async with self._flush_lock:
+            while self.buffer:
+                rows = self.buffer[:self.batch_size]
+                del self.buffer[:self.batch_size]
+                try:
+                    rest = await self._write(rows)
+                except asyncio.CancelledError:
+                    # Отмена посреди записи: пакет возвращается в буфер,
+                    # уже записанные строки при повторе отбросятся по первичному ключу
+                    self._requeue(rows)
+                    raise
+                if rest:
+                    self._requeue(rest)
+                    return
+
+    async def _write(self, rows: List[dict]) -> List[dict]:
+        try:
+            await self._insert(rows)
+            return []
+        except Exception as e:
+            print(f"Chat history flush error: {e}")
+            # Пакет мог упасть из-за одной строки: пишем по одной, плохие отбрасываем
+            return await self._insert_each(rows)
+
+    async def _insert(self, rows: List[dict]):
+        async with SessionLocal() as db:
+            await db.execute(insert(ChatMessage), rows)
+            await db.commit()
+
+    async def _insert_each(self, rows: List[dict]) -> List[dict]:
+        """Построчная запись; возвращает строки, не записанные из-за недоступности БД"""
+        for index, row in enumerate(rows):
+            try:
+                await self._insert([row])
+            except ROW_ERRORS as e:
+                print(f"Chat history dropped message {row['id']} in room {row['room']}: {e}")
+            except Exception as e:
+                print(f"Chat history flush error: {e}")
+                return rows[index:]
+        return []
+
+    def _requeue(self, rows: List[dict]):
+        """Возврат строк в начало буфера до следующей попытки"""
+        self.buffer[:0] = rows
+        dropped = len(self.buffer) - self.max_buffer
+        if dropped > 0:
+            del self.buffer[:dropped]
+            print(f"Chat history dropped {dropped} messages")
+
+    async def close(self):
+        if self._task is not None:
+            # Задача не отменяется, а дописывает текущий пакет и завершается
+            self._closing = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+chat_history = ChatHistoryWriter(
+    batch_size=settings.CHAT_HISTORY_BATCH_SIZE,
+    flush_interval=settings.CHAT_HISTORY_FLUSH_INTERVAL
+)
+
+def history_query(rooms: Iterable[str], user_id: Optional[int] = None) -> Select:
+    """
+    Сообщения комнат плоскими строками вместе с именем отправителя.
+    С user_id добавляются отправленные пользователем личные сообщения
+    (полученные лежат в его комнате user:<id>).
+    """
+    condition = ChatMessage.room.in_(list(rooms))
+    if user_id is not None:
+        condition = or_(
+            condition,
+            and_(ChatMessage.sender_id == user_id, ChatMessage.recipient_id.is_not(None))
+        )
+    return (
+        select(
+            ChatMessage.id,
+            ChatMessage.room,
+            ChatMessage.sender_id.label("user_id"),
+            User.username,
+            ChatMessage.recipient_id,
+            ChatMessage.text,
+            ChatMessage.created_at
+        )
+        .join(User, User.id == ChatMessage.sender_id)
+        .filter(condition)
+    )
+
+async def load_missed(rooms: Iterable[str], user_id: int, last_seen_id: int, limit: int):
+    """Сообщения после last_seen_id в порядке отправки"""
+    await chat_history.flush()
+    query = (
+        history_query(rooms, user_id)
+        .filter(ChatMessage.id > last_seen_id)
+        .order_by(ChatMessage.id)
+        .limit(limit)
+    )
+    async with SessionLocal() as db:
+        return (await db.execute(query)).all()
@@ -1,27 +1,40 @@
-from sqlalchemy.orm import Session
-from coffeeapp.db.base import Base
+from pathlib import Path
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect, select
+from sqlalchemy.engine import Connection
 from coffeeapp.db.session import engine, SessionLocal
-from coffeeapp.core.security import get_password_hash
+from coffeeapp.core.security import password_hasher
 from coffeeapp.models.user import User, UserRole
 
-def init_db():
-    # Создаем все таблицы заново
-    Base.metadata.create_all(bind=engine)
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+def run_migrations(connection: Connection):
+    config = Config(str(ALEMBIC_INI))
+    config.attributes["connection"] = connection
+    
+    # БД, созданные до появления миграций через create_all, помечаются начальной ревизией
+    tables = inspect(connection).get_table_names()
+    if "users" in tables and "alembic_version" not in tables:
+        command.stamp(config, "0001")
+    command.upgrade(config, "head")
+
+async def init_db():
+    # Применяем миграции схемы (включая поисковые индексы продуктов)
+    async with engine.begin() as conn:
+        await conn.run_sync(run_migrations)
     
     # Создаем админа если его нет
-    db = SessionLocal()
-    try:
-        admin = db.query(User).filter(User.role == UserRole.ADMIN).first()
+    async with SessionLocal() as db:
+        admin = await db.scalar(select(User).filter(User.role == UserRole.ADMIN))
         if not admin:
             admin = User(
                 email="admin@example.com",
                 username="admin",
-                hashed_password=get_password_hash("admin123"),
+                hashed_password=await password_hasher.hash("admin123"),
                 role=UserRole.ADMIN,
                 is_verified=True
             )
             db.add(admin)
-            db.commit()
+            await db.commit()
             print("Admin created successfully")
-    finally:
-        db.close() 
\ No newline at end of file
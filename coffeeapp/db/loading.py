@@ -0,0 +1,16 @@
+"""
+Политика загрузки связей.
+
+Коллекции в моделях объявлены с lazy="raise_on_sql": неявная ленивая загрузка
+(и связанный с ней N+1 при сериализации) приводит к ошибке. Эндпоинты, которым
+нужны связанные объекты, подключают опции ниже - по одному запросу на коллекцию.
+"""
+from sqlalchemy.orm import selectinload
+# Опции ниже настраивают мапперы уже при импорте: все модели со связями должны быть
+# зарегистрированы, иначе строковые ссылки ("User", "Product") не разрешатся
+from coffeeapp.models import category, product, user  # noqa: F401 - регистрация моделей
+from coffeeapp.models.cart import Cart
+from coffeeapp.models.order import Order
+
+CART_ITEMS = selectinload(Cart.items)
+ORDER_ITEMS = selectinload(Order.items)
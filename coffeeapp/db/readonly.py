@@ -0,0 +1,55 @@
+"""
+Read-only выборки для списочных эндпоинтов.
+
+Выбираются только колонки схемы ответа (в порядке ее полей) через Core:
+результат - легкие Row-кортежи без identity map, отслеживания изменений
+и прокси связей. Строки сериализуются напрямую (см. core/responses.py),
+поэтому набор колонок берется из самой схемы и не расходится с ней.
+"""
+from typing import Any, Dict, Iterable, List, Sequence, Tuple, Type
+from pydantic import BaseModel
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from coffeeapp.models.category import Category
+from coffeeapp.models.order import Order, OrderItem
+from coffeeapp.models.product import Product
+from coffeeapp.models.user import User
+from coffeeapp.schemas.category import Category as CategorySchema
+from coffeeapp.schemas.order import Order as OrderSchema, OrderItem as OrderItemSchema
+from coffeeapp.schemas.product import Product as ProductSchema
+from coffeeapp.schemas.user import UserInDB
+
+def schema_columns(model, schema: Type[BaseModel], exclude: Iterable[str] = ()) -> Tuple[Any, ...]:
+    """Колонки модели для полей схемы в порядке полей (exclude - вложенные списки и т.п.)"""
+    return tuple(getattr(model, name) for name in schema.model_fields if name not in exclude)
+
+PRODUCT_COLUMNS = schema_columns(Product, ProductSchema)
+CATEGORY_COLUMNS = schema_columns(Category, CategorySchema)
+USER_COLUMNS = schema_columns(User, UserInDB)
+ORDER_COLUMNS = schema_columns(Order, OrderSchema, exclude=("items",))
+ORDER_ITEM_COLUMNS = schema_columns(OrderItem, OrderItemSchema)
+
+def select_products() -> Select:
+    return select(*PRODUCT_COLUMNS)
+
+def select_categories() -> Select:
+    return select(*CATEGORY_COLUMNS)
+
+def select_users() -> Select:
+    return select(*USER_COLUMNS)
+
+def select_orders() -> Select:
+    return select(*ORDER_COLUMNS)
+
+async def with_order_items(db: AsyncSession, orders: Sequence[Any]) -> List[Dict[str, Any]]:
+    """Строки заказов в dict вместе с позициями; позиции всей страницы - одним запросом"""
+    items = {order.id: [] for order in orders}
+    if items:
+        item_rows = (await db.execute(
+            select(*ORDER_ITEM_COLUMNS)
+            .filter(OrderItem.order_id.in_(list(items)))
+            .order_by(OrderItem.id)
+        )).all()
+        for item in item_rows:
+            items[item.order_id].append(item._asdict())
+    return [{**order._asdict(), "items": items[order.id]} for order in orders]
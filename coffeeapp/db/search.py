@@ -0,0 +1,49 @@
+import re
+from typing import Optional, Tuple
+from sqlalchemy import Select, func, literal_column, select, text
+from coffeeapp.db.session import engine
+from coffeeapp.models.product import Product
+
+# Поисковые индексы создаются миграцией 0010 (products_fts в SQLite, GIN в PostgreSQL)
+
+# Документ для полнотекстового поиска в PostgreSQL; выражение совпадает с индексом
+PRODUCT_DOCUMENT = func.to_tsvector(
+    "simple",
+    func.coalesce(Product.name, "") + " " + func.coalesce(Product.description, "")
+)
+
+def search_products(query: Select, search: str, in_description: bool = False) -> Tuple[Select, Optional[object]]:
+    """
+    Фильтр поиска по продуктам с префиксным совпадением слов.
+    Возвращает запрос и выражение релевантности (по возрастанию - лучшие первыми).
+    """
+    terms = re.findall(r"\w+", search)
+    dialect = engine.dialect.name
+    
+    if not terms or dialect not in ("postgresql", "sqlite"):
+        return query.filter(Product.name.ilike(f"%{search}%")), None
+    
+    if dialect == "postgresql":
+        if in_description:
+            tsquery = func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+            query = query.filter(PRODUCT_DOCUMENT.op("@@")(tsquery))
+            return query, -func.ts_rank(PRODUCT_DOCUMENT, tsquery)
+        # Каждое слово - префикс слова в названии, как в FTS5 SQLite;
+        # регулярные выражения ~* используют триграммный индекс
+        query = query.filter(*(Product.name.op("~*")(rf"\m{term}") for term in terms))
+        return query, -func.similarity(Product.name, search)
+    
+    match = " ".join(f'"{term}"*' for term in terms)
+    if not in_description:
+        match = f"name : ({match})"
+    matches = (
+        select(
+            literal_column("rowid").label("product_id"),
+            literal_column("bm25(products_fts)").label("rank")
+        )
+        .select_from(text("products_fts"))
+        .where(text("products_fts MATCH :fts_query").bindparams(fts_query=match))
+        .subquery()
+    )
+    query = query.join(matches, matches.c.product_id == Product.id)
+    return query, matches.c.rank
@@ -0,0 +1,8 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from coffeeapp.db.session import engine
+
+def upsert(table):
+    """INSERT с поддержкой ON CONFLICT для текущего диалекта (PostgreSQL или SQLite)"""
+    if engine.dialect.name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
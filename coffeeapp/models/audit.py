@@ -0,0 +1,17 @@
+from datetime import datetime
+from sqlalchemy import JSON, Column, DateTime, ForeignKey, Index, Integer, String
+
+from coffeeapp.db.base import Base
+
+class AuditLog(Base):
+    __tablename__ = "audit_log"
+    __table_args__ = (
+        Index("ix_audit_log_target", "target_id", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    actor_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    action = Column(String, nullable=False)
+    target_id = Column(Integer, nullable=True)
+    details = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
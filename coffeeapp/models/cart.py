@@ -1,18 +1,26 @@
-from sqlalchemy import Column, Integer, ForeignKey, Float
+from sqlalchemy import Column, Integer, ForeignKey, Float, Index
 from sqlalchemy.orm import relationship
 from coffeeapp.db.base import Base
 
 class Cart(Base):
     __tablename__ = "carts"
+    __table_args__ = (
+        # Одна корзина на пользователя, используется при get-or-create корзины
+        Index("uq_carts_user_id", "user_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     
     user = relationship("User", back_populates="cart")
-    items = relationship("CartItem", back_populates="cart", cascade="all, delete-orphan")
+    items = relationship("CartItem", back_populates="cart", cascade="all, delete-orphan", lazy="raise_on_sql")
 
 class CartItem(Base):
     __tablename__ = "cart_items"
+    __table_args__ = (
+        # Одна строка на товар в корзине, используется при добавлении в корзину
+        Index("uq_cart_items_cart_product", "cart_id", "product_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     cart_id = Column(Integer, ForeignKey("carts.id"))
@@ -9,4 +9,4 @@ class Category(Base):
     name = Column(String, unique=True, index=True)
     description = Column(String, nullable=True)
     
-    products = relationship("Product", back_populates="category") 
\ No newline at end of file
+    products = relationship("Product", back_populates="category", lazy="raise_on_sql") 
\ No newline at end of file
@@ -0,0 +1,21 @@
+from datetime import datetime
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Index, Integer, String, Text
+
+from coffeeapp.db.base import Base
+
+class ChatMessage(Base):
+    __tablename__ = "chat_messages"
+    __table_args__ = (
+        # История комнаты и догрузка при переподключении (id растет со временем)
+        Index("ix_chat_messages_room_id", "room", "id"),
+        # Отправленные личные сообщения
+        Index("ix_chat_messages_sender_id", "sender_id", "id"),
+    )
+
+    # id генерируется приложением (coffeeapp/core/ids.py) до записи в БД
+    id = Column(BigInteger, primary_key=True, autoincrement=False)
+    room = Column(String, nullable=False)
+    sender_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    recipient_id = Column(Integer, ForeignKey("users.id"), nullable=True)  # только для личных сообщений
+    text = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
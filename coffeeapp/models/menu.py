@@ -0,0 +1,11 @@
+from sqlalchemy import Column, DateTime, Integer
+
+from coffeeapp.db.base import Base
+
+class MenuState(Base):
+    """Версия меню (одна строка): общая для всех воркеров, по ней строятся ETag и Last-Modified"""
+    __tablename__ = "menu_state"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    version = Column(Integer, nullable=False)
+    changed_at = Column(DateTime, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, Float, DateTime, Enum
+from sqlalchemy import Column, Integer, ForeignKey, Float, DateTime, Enum, Index, text
 from sqlalchemy.orm import relationship
 import enum
 from datetime import datetime
@@ -12,8 +12,24 @@ class OrderStatus(str, enum.Enum):
     COMPLETED = "completed"
     CANCELLED = "cancelled"
 
+# Условие открытого заказа литералами (Enum хранится по именам): запрос с ним
+# совпадает с условием частичного индекса, а с параметрами IN (?, ?, ?) - нет
+ACTIVE_ORDERS_WHERE = text("status IN ('PENDING', 'CONFIRMED', 'PREPARING')")
+
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # Заказы пользователя в порядке keyset-пагинации
+        Index("ix_orders_user_created", "user_id", "created_at", "id"),
+        # Частичный индекс открытых заказов для очереди бариста
+        Index(
+            "ix_orders_active_created",
+            "created_at",
+            "id",
+            postgresql_where=ACTIVE_ORDERS_WHERE,
+            sqlite_where=ACTIVE_ORDERS_WHERE
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -22,13 +38,13 @@ class Order(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     
     user = relationship("User", back_populates="orders")
-    items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
+    items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan", lazy="raise_on_sql")
 
 class OrderItem(Base):
     __tablename__ = "order_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"))
+    order_id = Column(Integer, ForeignKey("orders.id"), index=True)
     product_id = Column(Integer, ForeignKey("products.id"))
     quantity = Column(Integer)
     price = Column(Float)  
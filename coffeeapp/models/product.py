@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from coffeeapp.db.base import Base
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # Фильтр по категории с диапазоном цен
+        Index("ix_products_category_price", "category_id", "price"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
@@ -13,4 +17,4 @@ class Product(Base):
     category_id = Column(Integer, ForeignKey("categories.id"))
     
     category = relationship("Category", back_populates="products")
-    cart_items = relationship("CartItem", back_populates="product") 
\ No newline at end of file
+    cart_items = relationship("CartItem", back_populates="product", lazy="raise_on_sql") 
\ No newline at end of file
@@ -0,0 +1,36 @@
+from sqlalchemy import JSON, Column, DateTime, Float, Index, Integer, String, Text
+
+from coffeeapp.db.base import Base
+
+class SchedulerLease(Base):
+    """Аренда лидерства: задания запускает только воркер-владелец непросроченной аренды"""
+    __tablename__ = "scheduler_leases"
+
+    name = Column(String, primary_key=True)
+    owner = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+class SchedulerJob(Base):
+    """Расписание заданий: время следующего запуска переживает перезапуски и смену лидера"""
+    __tablename__ = "scheduler_jobs"
+
+    id = Column(String, primary_key=True)
+    next_run_at = Column(DateTime, nullable=True)
+
+class JobRun(Base):
+    """История запусков заданий планировщика"""
+    __tablename__ = "scheduler_job_runs"
+    __table_args__ = (
+        Index("ix_scheduler_job_runs_job_started", "job_id", "started_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String, nullable=False)
+    owner = Column(String, nullable=False)
+    started_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+    duration = Column(Float, nullable=True)  # секунды
+    status = Column(String, nullable=False)  # running, success, error
+    error = Column(Text, nullable=True)
+    # Результат задания (например, счетчики очистки), если оно вернуло dict
+    metrics = Column(JSON, nullable=True)
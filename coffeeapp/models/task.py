@@ -0,0 +1,33 @@
+from datetime import datetime
+from sqlalchemy import JSON, Column, DateTime, Index, Integer, String, Text
+
+from coffeeapp.db.base import Base
+
+class TaskStatus:
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+class BackgroundTask(Base):
+    """Долговременная очередь фоновых задач (см. coffeeapp/core/task_queue.py)"""
+    __tablename__ = "background_tasks"
+    __table_args__ = (
+        # Выборка следующей готовой задачи
+        Index("ix_background_tasks_status_run_at", "status", "run_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    # Повторная постановка с тем же ключом игнорируется
+    idempotency_key = Column(String, unique=True, nullable=True)
+    status = Column(String, nullable=False, default=TaskStatus.PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    run_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = Column(String, nullable=True)
+    locked_until = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Boolean, Column, Integer, String, DateTime, Enum
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, Enum, Index, text
 from sqlalchemy.orm import relationship
 import enum
 
@@ -11,6 +11,15 @@ class UserRole(str, enum.Enum):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Частичный индекс для очистки неверифицированных пользователей
+        Index(
+            "ix_users_unverified_expires",
+            "verification_expires",
+            postgresql_where=text("is_verified = false"),
+            sqlite_where=text("is_verified = 0")
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True)
@@ -22,6 +31,6 @@ class User(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     verification_expires = Column(DateTime, nullable=True)
     
-    # Отношения
-    orders = relationship("Order", back_populates="user")
-    cart = relationship("Cart", back_populates="user", uselist=False) 
\ No newline at end of file
+    # Отношения (загружаются только явно, см. coffeeapp/db/loading.py)
+    orders = relationship("Order", back_populates="user", lazy="raise_on_sql")
+    cart = relationship("Cart", back_populates="user", uselist=False, lazy="raise_on_sql") 
\ No newline at end of file
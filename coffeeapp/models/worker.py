@@ -0,0 +1,11 @@
+from sqlalchemy import Column, DateTime, Integer, String
+
+from coffeeapp.db.base import Base
+
+class WorkerIdLease(Base):
+    """Аренда номера воркера для генератора идентификаторов (coffeeapp/core/ids.py)"""
+    __tablename__ = "snowflake_workers"
+
+    worker_id = Column(Integer, primary_key=True, autoincrement=False)
+    owner = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import List
+from enum import Enum
 
 class CartItemBase(BaseModel):
     product_id: int
@@ -9,6 +10,14 @@ class CartItemCreate(BaseModel):
     product_id: int
     quantity: int
 
+class CartOperation(str, Enum):
+    ADD = "add"
+    SET = "set"
+    REMOVE = "remove"
+
+class CartItemOperation(CartItemCreate):
+    operation: CartOperation = CartOperation.ADD
+
 class CartItem(CartItemBase):
     id: int
     
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+class ChatMessage(BaseModel):
+    id: int
+    room: str
+    user_id: int
+    username: str
+    recipient_id: Optional[int] = None
+    text: str
+    created_at: datetime
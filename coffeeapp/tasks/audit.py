@@ -0,0 +1,14 @@
+from coffeeapp.core.task_queue import task
+from coffeeapp.db.session import SessionLocal
+from coffeeapp.models.audit import AuditLog
+
+@task("audit_role_change")
+async def audit_role_change(payload: dict):
+    async with SessionLocal() as db:
+        db.add(AuditLog(
+            actor_id=payload["actor_id"],
+            action="user.role_changed",
+            target_id=payload["user_id"],
+            details={"old_role": payload["old_role"], "new_role": payload["new_role"]}
+        ))
+        await db.commit()
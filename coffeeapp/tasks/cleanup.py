@@ -1,26 +1,64 @@
+import asyncio
+import time
 from datetime import datetime
-from sqlalchemy.orm import Session
-from coffeeapp.db.session import get_db
+from sqlalchemy import delete, false, select
+from coffeeapp.core.config import settings
+from coffeeapp.db.session import SessionLocal
 from coffeeapp.models.user import User
 
-async def cleanup_unverified_users():
-    db = next(get_db())
+# Прогресс текущего запуска очистки в этом воркере; итог сохраняется в JobRun.metrics
+cleanup_metrics = {
+    "running": False,
+    "deleted": 0,
+    "batches": 0,
+    "duration": 0.0,
+    "finished_at": None,
+}
+
+async def cleanup_unverified_users(batch_size: int = settings.CLEANUP_BATCH_SIZE) -> dict:
+    """
+    Удаление неверифицированных пользователей с истекшим сроком.
+    Пакетами по batch_size: короткая транзакция на пакет, между пакетами
+    цикл событий свободен; в памяти не больше одного пакета.
+    """
+    cutoff = datetime.utcnow()
+    started = time.perf_counter()
+    cleanup_metrics.update(running=True, deleted=0, batches=0, duration=0.0)
+
+    # false() совпадает с условием частичного индекса ix_users_unverified_expires
+    is_expired = (User.is_verified == false(), User.verification_expires < cutoff)
+    expired = (
+        select(User.id)
+        .filter(*is_expired)
+        .order_by(User.verification_expires)
+        .limit(batch_size)
+    )
     try:
-        current_time = datetime.utcnow()
-        unverified_users = (
-            db.query(User)
-            .filter(
-                User.is_verified == False,
-                User.verification_expires < current_time
-            )
-            .all()
-        )
-        
-        for user in unverified_users:
-            db.delete(user)
-        
-        db.commit()
-    finally:
-        db.close()
+        while True:
+            async with SessionLocal() as db:
+                rows = (await db.execute(expired)).all()
+                if not rows:
+                    break
+                # Условие повторяется: пользователь мог пройти верификацию после выборки
+                result = await db.execute(
+                    delete(User).where(User.id.in_([row.id for row in rows]), *is_expired)
+                )
+                await db.commit()
 
-    pass 
\ No newline at end of file
+            # Кэш пользователей не сбрасывается: токен выдается только после верификации,
+            # поэтому неверифицированного пользователя в кэше нет
+            cleanup_metrics["deleted"] += result.rowcount
+            cleanup_metrics["batches"] += 1
+            cleanup_metrics["duration"] = time.perf_counter() - started
+            print(f"Cleanup batch {cleanup_metrics['batches']}: deleted {cleanup_metrics['deleted']} users")
+
+            if len(rows) < batch_size:
+                break
+            await asyncio.sleep(0)
+    finally:
+        cleanup_metrics.update(
+            running=False,
+            duration=time.perf_counter() - started,
+            finished_at=datetime.utcnow().isoformat()
+        )
+    return dict(cleanup_metrics)
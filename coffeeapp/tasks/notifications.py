@@ -0,0 +1,24 @@
+from sqlalchemy import select
+from coffeeapp.core.task_queue import task
+from coffeeapp.db.session import SessionLocal
+from coffeeapp.models.order import OrderItem
+from coffeeapp.models.product import Product
+from coffeeapp.models.user import User
+
+# Почтовый сервер в проекте не настроен - письма пока пишутся в лог
+
+@task("send_welcome_email")
+async def send_welcome_email(payload: dict):
+    print(f"Welcome email to {payload['email']}: Добро пожаловать, {payload['username']}!")
+
+@task("send_order_receipt")
+async def send_order_receipt(payload: dict):
+    async with SessionLocal() as db:
+        email = await db.scalar(select(User.email).filter(User.id == payload["user_id"]))
+        items = (await db.execute(
+            select(Product.name, OrderItem.quantity, OrderItem.price)
+            .join(Product, Product.id == OrderItem.product_id)
+            .filter(OrderItem.order_id == payload["order_id"])
+        )).all()
+    lines = [f"{item.name} x{item.quantity}: {item.price * item.quantity:.2f}" for item in items]
+    print(f"Receipt for order {payload['order_id']} to {email}: {'; '.join(lines)}; итого {payload['total_amount']:.2f}")
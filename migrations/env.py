@@ -0,0 +1,75 @@
+import asyncio
+from logging.config import fileConfig
+
+from sqlalchemy import pool
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from alembic import context
+
+from coffeeapp.core.config import settings
+from coffeeapp.db.base import Base
+from coffeeapp.models import audit, cart, category, chat, menu, order, product, scheduler, task, user, worker  # noqa: F401 - регистрация моделей
+
+config = context.config
+
+target_metadata = Base.metadata
+
+# Объекты поиска из ревизии 0010, которых нет в моделях: FTS5-таблица с теневыми
+# таблицами в SQLite и GIN-индексы в PostgreSQL. Autogenerate не должен их удалять.
+SEARCH_INDEXES = {"ix_products_name_trgm", "ix_products_document"}
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == "table" and reflected and name.startswith("products_fts"):
+        return False
+    if type_ == "index" and reflected and name in SEARCH_INDEXES:
+        return False
+    return True
+
+def run_migrations_offline() -> None:
+    """Генерация SQL без подключения к БД (alembic upgrade --sql)"""
+    context.configure(
+        url=settings.DATABASE_URL,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+def do_run_migrations(connection: Connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        render_as_batch=connection.dialect.name == "sqlite"
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+async def run_async_migrations() -> None:
+    connectable = create_async_engine(settings.DATABASE_URL, poolclass=pool.NullPool)
+
+    async with connectable.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+
+    await connectable.dispose()
+
+def run_migrations_online() -> None:
+    # При запуске из приложения (init_db) соединение передается готовым
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        do_run_migrations(connection)
+        return
+
+    if config.config_file_name is not None:
+        fileConfig(config.config_file_name)
+    asyncio.run(run_async_migrations())
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,103 @@
+"""Начальная схема
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+ORDER_STATUS = sa.Enum(
+    "PENDING", "CONFIRMED", "PREPARING", "READY", "COMPLETED", "CANCELLED",
+    name="orderstatus"
+)
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String()),
+        sa.Column("username", sa.String()),
+        sa.Column("hashed_password", sa.String()),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("is_verified", sa.Boolean()),
+        sa.Column("role", sa.String()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("verification_expires", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+
+    op.create_table(
+        "categories",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String()),
+        sa.Column("description", sa.String(), nullable=True),
+    )
+    op.create_index("ix_categories_id", "categories", ["id"])
+    op.create_index("ix_categories_name", "categories", ["name"], unique=True)
+
+    op.create_table(
+        "products",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String()),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("price", sa.Float()),
+        sa.Column("image_url", sa.String(), nullable=True),
+        sa.Column("category_id", sa.Integer(), sa.ForeignKey("categories.id")),
+    )
+    op.create_index("ix_products_id", "products", ["id"])
+    op.create_index("ix_products_name", "products", ["name"])
+
+    op.create_table(
+        "carts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+    )
+    op.create_index("ix_carts_id", "carts", ["id"])
+
+    op.create_table(
+        "cart_items",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("cart_id", sa.Integer(), sa.ForeignKey("carts.id")),
+        sa.Column("product_id", sa.Integer(), sa.ForeignKey("products.id")),
+        sa.Column("quantity", sa.Integer()),
+    )
+    op.create_index("ix_cart_items_id", "cart_items", ["id"])
+
+    op.create_table(
+        "orders",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("status", ORDER_STATUS),
+        sa.Column("total_amount", sa.Float()),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    op.create_index("ix_orders_id", "orders", ["id"])
+
+    op.create_table(
+        "order_items",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("order_id", sa.Integer(), sa.ForeignKey("orders.id")),
+        sa.Column("product_id", sa.Integer(), sa.ForeignKey("products.id")),
+        sa.Column("quantity", sa.Integer()),
+        sa.Column("price", sa.Float()),
+    )
+    op.create_index("ix_order_items_id", "order_items", ["id"])
+
+def downgrade() -> None:
+    op.drop_table("order_items")
+    op.drop_table("orders")
+    op.drop_table("cart_items")
+    op.drop_table("carts")
+    op.drop_table("products")
+    op.drop_table("categories")
+    op.drop_table("users")
+    ORDER_STATUS.drop(op.get_bind(), checkfirst=True)
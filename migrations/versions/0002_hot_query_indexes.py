@@ -0,0 +1,58 @@
+"""Составные и частичные индексы для основных запросов
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Перед уникальным индексом объединяем дубли товаров в корзинах
+    op.execute(
+        """
+        UPDATE cart_items SET quantity = (
+            SELECT SUM(duplicate.quantity) FROM cart_items AS duplicate
+            WHERE duplicate.cart_id = cart_items.cart_id
+              AND duplicate.product_id = cart_items.product_id
+        )
+        WHERE id IN (
+            SELECT MIN(id) FROM cart_items
+            GROUP BY cart_id, product_id
+            HAVING COUNT(*) > 1
+        )
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM cart_items WHERE id NOT IN (
+            SELECT MIN(id) FROM cart_items GROUP BY cart_id, product_id
+        )
+        """
+    )
+    op.create_index(
+        "uq_cart_items_cart_product", "cart_items", ["cart_id", "product_id"], unique=True
+    )
+    op.create_index("ix_orders_user_created", "orders", ["user_id", "created_at", "id"])
+    op.create_index("ix_order_items_order_id", "order_items", ["order_id"])
+    op.create_index("ix_products_category_price", "products", ["category_id", "price"])
+    op.create_index(
+        "ix_users_unverified_expires",
+        "users",
+        ["verification_expires"],
+        postgresql_where=sa.text("is_verified = false"),
+        sqlite_where=sa.text("is_verified = 0")
+    )
+
+def downgrade() -> None:
+    op.drop_index("ix_users_unverified_expires", table_name="users")
+    op.drop_index("ix_products_category_price", table_name="products")
+    op.drop_index("ix_order_items_order_id", table_name="order_items")
+    op.drop_index("ix_orders_user_created", table_name="orders")
+    op.drop_index("uq_cart_items_cart_product", table_name="cart_items")
@@ -0,0 +1,50 @@
+"""Одна корзина на пользователя
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Товары из дублирующих корзин переносим в первую корзину пользователя
+    bind = op.get_bind()
+    duplicates = bind.execute(sa.text(
+        "SELECT id, (SELECT MIN(first.id) FROM carts AS first WHERE first.user_id = carts.user_id) "
+        "FROM carts WHERE id <> (SELECT MIN(first.id) FROM carts AS first WHERE first.user_id = carts.user_id)"
+    )).all()
+    for cart_id, target_id in duplicates:
+        items = bind.execute(
+            sa.text("SELECT product_id, quantity FROM cart_items WHERE cart_id = :cart_id"),
+            {"cart_id": cart_id}
+        ).all()
+        for product_id, quantity in items:
+            updated = bind.execute(
+                sa.text(
+                    "UPDATE cart_items SET quantity = quantity + :quantity "
+                    "WHERE cart_id = :target_id AND product_id = :product_id"
+                ),
+                {"quantity": quantity, "target_id": target_id, "product_id": product_id}
+            )
+            if updated.rowcount == 0:
+                bind.execute(
+                    sa.text(
+                        "INSERT INTO cart_items (cart_id, product_id, quantity) "
+                        "VALUES (:target_id, :product_id, :quantity)"
+                    ),
+                    {"quantity": quantity, "target_id": target_id, "product_id": product_id}
+                )
+        bind.execute(sa.text("DELETE FROM cart_items WHERE cart_id = :cart_id"), {"cart_id": cart_id})
+        bind.execute(sa.text("DELETE FROM carts WHERE id = :cart_id"), {"cart_id": cart_id})
+
+    op.create_index("uq_carts_user_id", "carts", ["user_id"], unique=True)
+
+def downgrade() -> None:
+    op.drop_index("uq_carts_user_id", table_name="carts")
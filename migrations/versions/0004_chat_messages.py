@@ -0,0 +1,32 @@
+"""История сообщений чата
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        "chat_messages",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=False),
+        sa.Column("room", sa.String(), nullable=False),
+        sa.Column("sender_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("recipient_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("text", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    op.create_index("ix_chat_messages_room_id", "chat_messages", ["room", "id"])
+    op.create_index("ix_chat_messages_sender_id", "chat_messages", ["sender_id", "id"])
+
+def downgrade() -> None:
+    op.drop_index("ix_chat_messages_sender_id", table_name="chat_messages")
+    op.drop_index("ix_chat_messages_room_id", table_name="chat_messages")
+    op.drop_table("chat_messages")
@@ -0,0 +1,28 @@
+"""Частичный индекс открытых заказов
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+ACTIVE_ORDERS = "status IN ('PENDING', 'CONFIRMED', 'PREPARING')"
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_orders_active_created",
+        "orders",
+        ["created_at", "id"],
+        postgresql_where=sa.text(ACTIVE_ORDERS),
+        sqlite_where=sa.text(ACTIVE_ORDERS)
+    )
+
+def downgrade() -> None:
+    op.drop_index("ix_orders_active_created", table_name="orders")
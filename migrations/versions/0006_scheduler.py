@@ -0,0 +1,43 @@
+"""Аренда лидерства и история запусков планировщика
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        "scheduler_leases",
+        sa.Column("name", sa.String(), primary_key=True),
+        sa.Column("owner", sa.String(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+    )
+    op.create_table(
+        "scheduler_job_runs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("job_id", sa.String(), nullable=False),
+        sa.Column("owner", sa.String(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=False),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("duration", sa.Float(), nullable=True),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("error", sa.Text(), nullable=True),
+    )
+    op.create_index("ix_scheduler_job_runs_id", "scheduler_job_runs", ["id"])
+    op.create_index(
+        "ix_scheduler_job_runs_job_started", "scheduler_job_runs", ["job_id", "started_at"]
+    )
+
+def downgrade() -> None:
+    op.drop_index("ix_scheduler_job_runs_job_started", table_name="scheduler_job_runs")
+    op.drop_index("ix_scheduler_job_runs_id", table_name="scheduler_job_runs")
+    op.drop_table("scheduler_job_runs")
+    op.drop_table("scheduler_leases")
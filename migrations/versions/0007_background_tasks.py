@@ -0,0 +1,55 @@
+"""Очередь фоновых задач и журнал аудита
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        "background_tasks",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("idempotency_key", sa.String(), nullable=True),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("max_attempts", sa.Integer(), nullable=False),
+        sa.Column("run_at", sa.DateTime(), nullable=False),
+        sa.Column("locked_by", sa.String(), nullable=True),
+        sa.Column("locked_until", sa.DateTime(), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint("idempotency_key"),
+    )
+    op.create_index("ix_background_tasks_id", "background_tasks", ["id"])
+    op.create_index("ix_background_tasks_status_run_at", "background_tasks", ["status", "run_at"])
+
+    op.create_table(
+        "audit_log",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("actor_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("action", sa.String(), nullable=False),
+        sa.Column("target_id", sa.Integer(), nullable=True),
+        sa.Column("details", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    op.create_index("ix_audit_log_id", "audit_log", ["id"])
+    op.create_index("ix_audit_log_target", "audit_log", ["target_id", "created_at"])
+
+def downgrade() -> None:
+    op.drop_index("ix_audit_log_target", table_name="audit_log")
+    op.drop_index("ix_audit_log_id", table_name="audit_log")
+    op.drop_table("audit_log")
+    op.drop_index("ix_background_tasks_status_run_at", table_name="background_tasks")
+    op.drop_index("ix_background_tasks_id", table_name="background_tasks")
+    op.drop_table("background_tasks")
@@ -0,0 +1,26 @@
+"""Расписание заданий планировщика
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        "scheduler_jobs",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("next_run_at", sa.DateTime(), nullable=True),
+    )
+    # Таблица синхронного хранилища APScheduler больше не используется
+    op.execute("DROP TABLE IF EXISTS apscheduler_jobs")
+
+def downgrade() -> None:
+    op.drop_table("scheduler_jobs")
@@ -0,0 +1,25 @@
+"""Аренда номеров воркеров для идентификаторов сообщений
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        "snowflake_workers",
+        sa.Column("worker_id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("owner", sa.String(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+    )
+
+def downgrade() -> None:
+    op.drop_table("snowflake_workers")
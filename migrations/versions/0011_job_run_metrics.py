@@ -0,0 +1,21 @@
+"""Результаты запусков заданий планировщика
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.add_column("scheduler_job_runs", sa.Column("metrics", sa.JSON(), nullable=True))
+
+def downgrade() -> None:
+    with op.batch_alter_table("scheduler_job_runs") as batch_op:
+        batch_op.drop_column("metrics")
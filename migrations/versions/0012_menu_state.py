@@ -0,0 +1,29 @@
+"""Общая версия меню
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-18
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    menu_state = op.create_table(
+        "menu_state",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("changed_at", sa.DateTime(), nullable=False),
+    )
+    op.bulk_insert(menu_state, [
+        {"id": 1, "version": 0, "changed_at": datetime.utcnow().replace(microsecond=0)},
+    ])
+
+def downgrade() -> None:
+    op.drop_table("menu_state")
@@ -0,0 +1,104 @@
+import os
+import tempfile
+import uuid
+from contextlib import contextmanager
+
+# Отдельная БД для тестов; DATABASE_URL можно задать явно (например, PostgreSQL)
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/test.db")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import httpx
+import pytest
+from sqlalchemy import event
+
+from coffeeapp.models import audit, cart, category, chat, menu, order, product, scheduler, task, user, worker  # noqa: F401 - регистрация моделей
+from coffeeapp.core.dependencies import principal_cache
+from coffeeapp.core.security import create_access_token
+from coffeeapp.db.session import SessionLocal, engine
+from coffeeapp.models.user import User, UserRole
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture(scope="session")
+async def database():
+    """Схема через миграции, как при запуске приложения"""
+    from coffeeapp.db.init_db import init_db
+    await init_db()
+
+@pytest.fixture
+async def make_user(database):
+    async def make(role: UserRole = UserRole.USER) -> User:
+        name = uuid.uuid4().hex[:12]
+        async with SessionLocal() as db:
+            user = User(
+                email=f"{name}@example.com",
+                username=name,
+                hashed_password="-",
+                role=role,
+                is_verified=True
+            )
+            db.add(user)
+            await db.commit()
+            return user
+    return make
+
+@pytest.fixture
+def query_plans(database):
+    """
+    Планы выполняемых SELECT, UPDATE и DELETE: перед каждым запросом тот же SQL с теми же
+    параметрами выполняется через EXPLAIN. Элементы - (sql, план одной строкой).
+    """
+    plans = []
+    if engine.dialect.name == "postgresql":
+        explain = "EXPLAIN "
+    else:
+        explain = "EXPLAIN QUERY PLAN "
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            if engine.dialect.name == "postgresql":
+                # На маленьких тестовых таблицах PostgreSQL иначе выбирает seq scan
+                cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(explain + statement, parameters)
+            plans.append((statement, "\n".join(str(row[-1]) for row in cursor.fetchall())))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    yield plans
+    event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+@pytest.fixture
+def count_statements(database):
+    """
+    Счетчик SQL-запросов: with count_statements() as statements: ...
+    """
+    @contextmanager
+    def counting():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    return counting
+
+@pytest.fixture
+async def api(database):
+    """HTTP-клиент приложения без lifespan (фоновые службы не запускаются)"""
+    from app import app
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test/api/v1") as client:
+        yield client
+
+@pytest.fixture
+def auth_headers():
+    """Заголовок с токеном пользователя; кэш пользователя сбрасывается"""
+    def headers(user: User) -> dict:
+        principal_cache.invalidate(user.email)
+        return {"Authorization": f"Bearer {create_access_token({'sub': user.email})}"}
+    return headers
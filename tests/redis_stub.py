@@ -0,0 +1,130 @@
+"""
+Минимальный сервер с протоколом Redis (RESP2 и RESP3 через HELLO) для тестов
+брокера: PING, PUBLISH, (P)SUBSCRIBE, (P)UNSUBSCRIBE. Данные не хранятся,
+сообщения доставляются подписчикам в порядке PUBLISH, как в Redis.
+"""
+import asyncio
+from fnmatch import fnmatchcase
+from typing import List, Optional, Set
+
+def encode(value) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, str):
+        value = value.encode()
+    if isinstance(value, bytes):
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+    if isinstance(value, dict):
+        return b"%%%d\r\n" % len(value) + b"".join(
+            encode(key) + encode(item) for key, item in value.items()
+        )
+    return b"*%d\r\n" % len(value) + b"".join(encode(item) for item in value)
+
+class Client:
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.channels: Set[bytes] = set()
+        self.patterns: Set[bytes] = set()
+        self.protocol = 2
+
+    @property
+    def subscriptions(self) -> int:
+        return len(self.channels) + len(self.patterns)
+
+    def send(self, value):
+        self.writer.write(encode(value))
+
+    def push(self, value: list):
+        """События pub/sub: массив в RESP2, push-фрейм в RESP3"""
+        frame = encode(value)
+        self.writer.write(b">" + frame[1:] if self.protocol == 3 else frame)
+
+class RedisStub:
+    def __init__(self):
+        self.clients: List[Client] = []
+        self.server: Optional[asyncio.base_events.Server] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"redis://{host}:{port}/0"
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+
+    async def close(self):
+        self.server.close()
+        for client in self.clients:
+            client.writer.close()
+        await self.server.wait_closed()
+
+    async def _read_command(self, reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+        line = await reader.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            # Inline-команда (например, из redis-cli)
+            return line.split()
+        args = []
+        for _ in range(int(line[1:])):
+            length = int((await reader.readline())[1:])
+            args.append((await reader.readexactly(length + 2))[:-2])
+        return args
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        client = Client(writer)
+        self.clients.append(client)
+        try:
+            while (command := await self._read_command(reader)) is not None:
+                self._execute(client, command[0].upper().decode(), command[1:])
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.clients.remove(client)
+            writer.close()
+
+    def _execute(self, client: Client, name: str, args: List[bytes]):
+        if name == "PING":
+            client.writer.write(encode(args[0]) if args else b"+PONG\r\n")
+        elif name == "HELLO":
+            if args:
+                client.protocol = int(args[0])
+            hello = {"server": "redis", "version": "7.0.0", "proto": client.protocol, "mode": "standalone"}
+            client.writer.write(
+                encode(hello) if client.protocol == 3
+                else encode([item for pair in hello.items() for item in pair])
+            )
+        elif name in ("CLIENT", "SELECT"):
+            client.writer.write(b"+OK\r\n")
+        elif name == "PUBLISH":
+            client.send(self.publish(args[0], args[1]))
+        elif name in ("SUBSCRIBE", "PSUBSCRIBE"):
+            target = client.channels if name == "SUBSCRIBE" else client.patterns
+            for arg in args:
+                target.add(arg)
+                client.push([name.lower(), arg, client.subscriptions])
+        elif name in ("UNSUBSCRIBE", "PUNSUBSCRIBE"):
+            target = client.channels if name == "UNSUBSCRIBE" else client.patterns
+            names = args or sorted(target)
+            if not names:
+                client.push([name.lower(), None, client.subscriptions])
+            for arg in names:
+                target.discard(arg)
+                client.push([name.lower(), arg, client.subscriptions])
+        else:
+            client.writer.write(b"-ERR unknown command '%s'\r\n" % name.encode())
+
+    def publish(self, channel: bytes, message: bytes) -> int:
+        received = 0
+        for client in self.clients:
+            if channel in client.channels:
+                client.push([b"message", channel, message])
+                received += 1
+            for pattern in client.patterns:
+                if fnmatchcase(channel.decode(), pattern.decode()):
+                    client.push([b"pmessage", pattern, channel, message])
+                    received += 1
+        return received
@@ -0,0 +1,67 @@
+import asyncio
+import pytest
+from coffeeapp.core.broker import RedisBroker
+from tests.redis_stub import RedisStub
+
+pytestmark = pytest.mark.anyio
+
+ROOMS = ["support:1", "support:2", "orders", "staff"]
+MESSAGES_PER_ROOM = 200
+
+@pytest.fixture
+async def redis_url():
+    stub = RedisStub()
+    await stub.start()
+    yield stub.url
+    await stub.close()
+
+async def collect(messages, expected: int) -> list:
+    received = []
+    async for item in messages:
+        received.append(item)
+        if len(received) == expected:
+            break
+    return received
+
+async def test_redis_broker_keeps_order_within_room(redis_url):
+    # Два воркера публикуют, третий слушает: порядок внутри комнаты сохраняется
+    publishers = [RedisBroker(redis_url), RedisBroker(redis_url)]
+    listener = RedisBroker(redis_url)
+    try:
+        messages = await listener.subscribe()
+        expected = len(publishers) * len(ROOMS) * MESSAGES_PER_ROOM
+        receiving = asyncio.create_task(collect(messages, expected))
+
+        async def publish_room(worker: int, room: str):
+            for index in range(MESSAGES_PER_ROOM):
+                await publishers[worker].publish(room, f"{worker}:{index}")
+
+        await asyncio.gather(*(
+            publish_room(worker, room) for worker in range(len(publishers)) for room in ROOMS
+        ))
+        received = await asyncio.wait_for(receiving, 10)
+        await messages.aclose()
+    finally:
+        for broker in publishers + [listener]:
+            await broker.close()
+
+    for room in ROOMS:
+        for worker in range(len(publishers)):
+            sequence = [
+                int(message.split(":")[1]) for channel, message in received
+                if channel == room and message.startswith(f"{worker}:")
+            ]
+            assert sequence == list(range(MESSAGES_PER_ROOM)), room
+
+async def test_redis_broker_ignores_other_prefixes(redis_url):
+    chat = RedisBroker(redis_url)
+    cache = RedisBroker(redis_url, prefix="cache:")
+    try:
+        messages = await chat.subscribe()
+        await cache.publish("menu", "reset")
+        await chat.publish("staff", "hello")
+        assert await asyncio.wait_for(collect(messages, 1), 5) == [("staff", "hello")]
+        await messages.aclose()
+    finally:
+        await chat.close()
+        await cache.close()
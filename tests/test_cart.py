@@ -0,0 +1,102 @@
+import asyncio
+import uuid
+import pytest
+from sqlalchemy import select
+from coffeeapp.db.session import SessionLocal
+from coffeeapp.models.cart import Cart, CartItem
+from coffeeapp.models.category import Category
+from coffeeapp.models.product import Product
+
+pytestmark = pytest.mark.anyio
+
+CONCURRENT_REQUESTS = 20
+
+@pytest.fixture
+async def product_ids(database):
+    async with SessionLocal() as db:
+        category = Category(name=uuid.uuid4().hex)
+        db.add(category)
+        await db.flush()
+        products = [Product(name="latte", price=3.5, category_id=category.id) for _ in range(2)]
+        db.add_all(products)
+        await db.commit()
+        return [product.id for product in products]
+
+async def test_concurrent_add_to_cart_loses_no_updates(api, make_user, product_ids, auth_headers):
+    user = await make_user()
+    headers = auth_headers(user)
+
+    # Корзины еще нет: параллельные запросы одновременно создают ее и увеличивают количество
+    responses = await asyncio.gather(*[
+        api.post(
+            "/cart",
+            json={"product_id": product_ids[i % 2], "quantity": 1 + i % 3},
+            headers=headers
+        )
+        for i in range(CONCURRENT_REQUESTS)
+    ])
+    assert [response.status_code for response in responses] == [200] * CONCURRENT_REQUESTS
+
+    expected = {product_id: 0 for product_id in product_ids}
+    for i in range(CONCURRENT_REQUESTS):
+        expected[product_ids[i % 2]] += 1 + i % 3
+    async with SessionLocal() as db:
+        carts = (await db.scalars(select(Cart.id).filter(Cart.user_id == user.id))).all()
+        quantities = dict((await db.execute(
+            select(CartItem.product_id, CartItem.quantity).filter(CartItem.cart_id.in_(carts))
+        )).all())
+    assert len(carts) == 1
+    assert quantities == expected
+
+async def batch(api, headers, *operations) -> dict:
+    response = await api.post("/cart/batch", json=[
+        {"operation": operation, "product_id": product_id, "quantity": quantity}
+        for operation, product_id, quantity in operations
+    ], headers=headers)
+    assert response.status_code == 200, response.text
+    return {item["product_id"]: item["quantity"] for item in response.json()["items"]}
+
+async def test_batch_applies_mixed_operations(api, make_user, product_ids, auth_headers):
+    headers = auth_headers(await make_user())
+    first, second = product_ids
+
+    assert await batch(api, headers, ("add", first, 2), ("set", second, 5)) == {first: 2, second: 5}
+    # remove, затем add - позиция создается заново с указанным количеством
+    assert await batch(
+        api, headers, ("add", first, 3), ("remove", second, 0), ("add", second, 1)
+    ) == {first: 5, second: 1}
+    # add после set прибавляется к установленному значению
+    assert await batch(
+        api, headers, ("set", first, 1), ("add", first, 2), ("add", second, -1)
+    ) == {first: 3}
+
+async def test_batch_negative_add_decrements_and_removes(api, make_user, product_ids, auth_headers):
+    user = await make_user()
+    headers = auth_headers(user)
+    first, second = product_ids
+
+    await batch(api, headers, ("add", first, 5))
+    assert await batch(api, headers, ("add", first, -2)) == {first: 3}
+    # Сумма add по товару равна нулю - ничего не меняется
+    assert await batch(api, headers, ("add", first, 1), ("add", first, -1)) == {first: 3}
+    # Уменьшение ниже нуля удаляет позицию, отсутствующая позиция не создается
+    assert await batch(api, headers, ("add", first, -4), ("add", second, -1)) == {}
+    assert await batch(api, headers, ("set", first, -1)) == {}
+
+    async with SessionLocal() as db:
+        quantities = (await db.scalars(
+            select(CartItem.quantity).join(Cart).filter(Cart.user_id == user.id)
+        )).all()
+    assert quantities == []
+
+async def test_batch_rejects_unknown_product(api, make_user, product_ids, auth_headers):
+    headers = auth_headers(await make_user())
+    first = product_ids[0]
+    await batch(api, headers, ("add", first, 1))
+
+    response = await api.post("/cart/batch", json=[
+        {"operation": "add", "product_id": first, "quantity": 1},
+        {"operation": "add", "product_id": max(product_ids) + 1000, "quantity": 1},
+    ], headers=headers)
+    assert response.status_code == 404
+    assert await batch(api, headers) == {first: 1}
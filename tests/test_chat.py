@@ -0,0 +1,160 @@
+import asyncio
+import json
+import pytest
+from coffeeapp.api.v1.endpoints import chat
+from coffeeapp.api.v1.endpoints.chat import STAFF_ROOM, ConnectionManager, handle_client_message, support_room
+from coffeeapp.core.broker import MemoryBroker
+from coffeeapp.core.ids import snowflake
+from coffeeapp.models.user import UserRole
+
+pytestmark = pytest.mark.anyio
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(json.loads(message["text"]))
+
+    async def close(self, code: int = 1000):
+        pass
+
+    def events(self, type: str):
+        return [event for event in self.sent if event["type"] == type]
+
+@pytest.fixture
+async def manager(monkeypatch):
+    manager = ConnectionManager(MemoryBroker())
+    monkeypatch.setattr(chat, "manager", manager)
+    if snowflake.worker_id is None:
+        monkeypatch.setattr(snowflake, "worker_id", 1022)
+    yield manager
+    await manager.close()
+
+async def settle():
+    """Слушатель брокера и писатели соединений разбирают очереди"""
+    await asyncio.sleep(0.05)
+
+async def connect(manager, user):
+    websocket = FakeWebSocket()
+    connection = await manager.connect(websocket, user)
+    return websocket, connection
+
+async def test_assignment_is_released_on_leave_and_disconnect(manager, make_user):
+    customer = await make_user()
+    admin = await make_user(UserRole.ADMIN)
+    other_admin = await make_user(UserRole.ADMIN)
+    customer_ws, customer_conn = await connect(manager, customer)
+    admin_ws, admin_conn = await connect(manager, admin)
+    queue_ws, _ = await connect(manager, other_admin)
+    room = support_room(customer.id)
+
+    await handle_client_message(admin_conn, json.dumps({"action": "join", "room": room}))
+    await settle()
+    assert manager.assignments[customer.id] == admin.id
+    await handle_client_message(customer_conn, "assigned")
+    await settle()
+    assert "assigned" not in [event.get("text") for event in queue_ws.events("message")]
+
+    await handle_client_message(admin_conn, json.dumps({"action": "leave", "room": room}))
+    await settle()
+    assert customer.id not in manager.assignments
+    assert customer_ws.events("unassigned") and queue_ws.events("unassigned")
+    await handle_client_message(customer_conn, "back in queue")
+    await settle()
+    assert "back in queue" in [event["text"] for event in queue_ws.events("message")]
+
+    # Отключение назначенного администратора, как в websocket_endpoint
+    await handle_client_message(admin_conn, json.dumps({"action": "join", "room": room}))
+    await settle()
+    assert manager.assignments[customer.id] == admin.id
+    manager.disconnect(admin_ws)
+    await manager.release_assignments(admin_conn, admin_conn.rooms)
+    await settle()
+    assert customer.id not in manager.assignments
+
+async def test_stale_unassigned_keeps_the_new_assignment(manager, make_user):
+    customer = await make_user()
+    first, second = await make_user(UserRole.ADMIN), await make_user(UserRole.ADMIN)
+    await manager.start()
+    await manager.publish_control(type="assigned", customer_id=customer.id, admin_id=second.id)
+    await manager.publish_control(type="unassigned", customer_id=customer.id, admin_id=first.id)
+    await settle()
+    assert manager.assignments[customer.id] == second.id
+
+async def test_invalid_rooms_and_text_are_ignored(manager, make_user):
+    customer = await make_user()
+    admin = await make_user(UserRole.ADMIN)
+    customer_ws, customer_conn = await connect(manager, customer)
+    admin_ws, admin_conn = await connect(manager, admin)
+
+    for payload in (
+        {"action": "join", "room": "support:abc"},
+        {"action": "leave", "room": "support:"},
+        {"action": "message", "room": "support:abc", "text": "x"},
+        {"action": "message", "room": STAFF_ROOM, "text": {"x": 1}},
+        {"action": "direct", "to": customer.id, "text": ["x"]},
+    ):
+        await handle_client_message(admin_conn, json.dumps(payload))
+    await handle_client_message(customer_conn, json.dumps({"action": "message", "text": 5}))
+    await settle()
+
+    assert manager.assignments == {}
+    assert admin_conn.rooms == {f"user:{admin.id}", STAFF_ROOM}
+    assert customer_ws.events("message") == [] and admin_ws.events("message") == []
+
+@pytest.fixture
+async def workers():
+    """Два запущенных (как в lifespan) воркера с общим брокером"""
+    broker = MemoryBroker()
+    workers = [ConnectionManager(broker), ConnectionManager(broker)]
+    for worker in workers:
+        await worker.start()
+    yield workers
+    for worker in workers:
+        await worker.close()
+
+def online_users(snapshot: dict, room: str) -> set:
+    return {user["user_id"] for user in snapshot["online"].get(room, [])}
+
+async def test_staff_connecting_later_gets_presence_snapshot(workers, make_user):
+    first, second = workers
+    customer = await make_user()
+    admin = await make_user(UserRole.ADMIN)
+    await connect(first, customer)
+    await settle()
+
+    admin_ws, _ = await connect(second, admin)
+    await settle()
+    [snapshot] = admin_ws.events("presence_snapshot")
+    assert online_users(snapshot, support_room(customer.id)) == {customer.id}
+    assert online_users(snapshot, STAFF_ROOM) == {admin.id}
+
+    # Воркер, запущенный позже, запрашивает списки остальных при старте
+    late = ConnectionManager(first.broker)
+    await late.start()
+    await settle()
+    assert customer.id in late.online()[support_room(customer.id)]
+    await late.close()
+
+async def test_presence_follows_disconnect_and_worker_loss(workers, make_user, monkeypatch):
+    monkeypatch.setattr(chat.settings, "CHAT_PRESENCE_INTERVAL", 0.05)
+    first, second = workers
+    customer, other = await make_user(), await make_user()
+    customer_ws, customer_conn = await connect(first, customer)
+    other_ws, _ = await connect(first, other)
+    await settle()
+    assert {customer.id, other.id} <= {
+        user_id for room, users in second.online().items() for user_id in users
+    }
+
+    first.disconnect(customer_ws)
+    await first.publish_presence(customer_conn, "offline", customer_conn.rooms)
+    await settle()
+    assert support_room(customer.id) not in second.online()
+
+    # Воркер пропал без рассылки offline: его список устаревает через три интервала
+    first._heartbeat.cancel()
+    first._listener.cancel()
+    await asyncio.sleep(0.2)
+    assert support_room(other.id) not in second.online()
@@ -0,0 +1,109 @@
+import asyncio
+from datetime import datetime
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+from coffeeapp.core.ids import SnowflakeGenerator
+from coffeeapp.db.chat_history import ChatHistoryWriter
+from coffeeapp.db.session import SessionLocal
+from coffeeapp.models.chat import ChatMessage
+
+pytestmark = pytest.mark.anyio
+
+ids = SnowflakeGenerator(1023)
+
+def make_row(sender_id: int, text="hi", **values) -> dict:
+    row = {
+        "id": ids.next_id(),
+        "room": f"support:{sender_id}",
+        "sender_id": sender_id,
+        "recipient_id": None,
+        "text": text,
+        "created_at": datetime.utcnow(),
+    }
+    row.update(values)
+    return row
+
+async def stored_ids(room: str):
+    async with SessionLocal() as db:
+        return set((await db.scalars(select(ChatMessage.id).filter(ChatMessage.room == room))).all())
+
+async def test_add_rejects_non_string_text(make_user):
+    user = await make_user()
+    writer = ChatHistoryWriter(batch_size=10, flush_interval=60)
+    with pytest.raises(ValueError):
+        writer.add(make_row(user.id, text={"x": 1}))
+    assert writer.buffer == []
+
+async def test_bad_rows_do_not_block_the_batch(make_user):
+    user = await make_user()
+    writer = ChatHistoryWriter(batch_size=10, flush_interval=60)
+    first = make_row(user.id)
+    writer.buffer.append(first)
+    await writer.flush()
+
+    good = [make_row(user.id), make_row(user.id)]
+    # Повтор id и значение неподдерживаемого типа попадают в один пакет с нормальными строками
+    writer.buffer.extend([good[0], dict(first), make_row(user.id, text={"x": 1}), good[1]])
+    await writer.flush()
+
+    assert writer.buffer == []
+    assert await stored_ids(first["room"]) == {first["id"], good[0]["id"], good[1]["id"]}
+
+async def test_rows_are_kept_while_database_is_unavailable(make_user, monkeypatch):
+    user = await make_user()
+    writer = ChatHistoryWriter(batch_size=10, flush_interval=60)
+    rows = [make_row(user.id), make_row(user.id)]
+    writer.buffer.extend(rows)
+
+    async def unavailable(rows):
+        raise OperationalError("INSERT", {}, Exception("database is locked"))
+    monkeypatch.setattr(writer, "_insert", unavailable)
+    await writer.flush()
+    assert writer.buffer == rows
+
+    monkeypatch.undo()
+    await writer.flush()
+    assert await stored_ids(rows[0]["room"]) == {row["id"] for row in rows}
+
+def recording_writer(monkeypatch, delay: float = 0) -> tuple:
+    """Писатель без БД: записанные пакеты собираются в список"""
+    writer = ChatHistoryWriter(batch_size=10, flush_interval=0.01)
+    written = []
+
+    async def insert(rows):
+        await asyncio.sleep(delay)
+        written.extend(rows)
+    monkeypatch.setattr(writer, "_insert", insert)
+    return writer, written
+
+def test_writer_restarts_on_a_new_event_loop(monkeypatch):
+    writer, written = recording_writer(monkeypatch)
+
+    async def lifespan():
+        await writer.start()
+        writer.add(make_row(1))
+        # Сброс по таймеру, без close()
+        for _ in range(100):
+            if not writer.buffer:
+                break
+            await asyncio.sleep(0.01)
+        await writer.close()
+
+    asyncio.run(lifespan())
+    asyncio.run(lifespan())
+    assert len(written) == 2
+
+def test_close_waits_for_the_batch_in_progress(monkeypatch):
+    writer, written = recording_writer(monkeypatch, delay=0.1)
+
+    async def lifespan():
+        await writer.start()
+        writer.add(make_row(1))
+        await asyncio.sleep(0.05)
+        # Пакет уже забран из буфера и пишется
+        assert writer.buffer == []
+        await writer.close()
+
+    asyncio.run(lifespan())
+    assert len(written) == 1
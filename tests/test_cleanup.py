@@ -0,0 +1,56 @@
+import uuid
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import event, select
+from coffeeapp.core import scheduler
+from coffeeapp.db.session import SessionLocal, engine
+from coffeeapp.models.scheduler import JobRun
+from coffeeapp.models.user import User
+from coffeeapp.tasks.cleanup import cleanup_unverified_users
+
+pytestmark = pytest.mark.anyio
+
+async def make_unverified(count: int) -> list:
+    expired = datetime.utcnow() - timedelta(days=1)
+    async with SessionLocal() as db:
+        users = []
+        for _ in range(count):
+            name = uuid.uuid4().hex[:12]
+            users.append(User(
+                email=f"{name}@example.com", username=name, hashed_password="-",
+                is_verified=False, verification_expires=expired
+            ))
+        db.add_all(users)
+        await db.commit()
+        return [user.id for user in users]
+
+async def test_user_verified_after_select_is_kept(database):
+    expired_id, racer_id = await make_unverified(2)
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # Пользователь проходит верификацию между выборкой пакета и удалением
+        if statement.lstrip().upper().startswith("DELETE FROM USERS"):
+            cursor.execute(f"UPDATE users SET is_verified = true WHERE id = {racer_id}")
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        metrics = await cleanup_unverified_users()
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+    async with SessionLocal() as db:
+        remaining = set((await db.scalars(select(User.id).filter(User.id.in_([expired_id, racer_id])))).all())
+    assert remaining == {racer_id}
+    assert metrics["deleted"] >= 1
+
+async def test_job_run_records_metrics(database, monkeypatch):
+    await make_unverified(3)
+    monkeypatch.setattr(scheduler.scheduler_service, "is_leader", True)
+    await scheduler.run_job("cleanup_unverified_users")
+    async with SessionLocal() as db:
+        run = await db.scalar(
+            select(JobRun).filter(JobRun.job_id == "cleanup_unverified_users").order_by(JobRun.id.desc())
+        )
+    assert run.status == "success"
+    assert run.metrics["deleted"] >= 3
+    assert run.metrics["running"] is False
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import delete, update
+from coffeeapp.core.ids import SEQUENCE_BITS, WORKER_BITS, SnowflakeGenerator, WorkerIdService
+from coffeeapp.db.session import SessionLocal
+from coffeeapp.models.worker import WorkerIdLease
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+async def leases(database):
+    async with SessionLocal() as db:
+        await db.execute(delete(WorkerIdLease))
+        await db.commit()
+
+def worker_of(snowflake_id: int) -> int:
+    return (snowflake_id >> SEQUENCE_BITS) & ((1 << WORKER_BITS) - 1)
+
+async def test_workers_get_distinct_ids(leases):
+    services = [WorkerIdService(SnowflakeGenerator(), ttl=60) for _ in range(8)]
+    for service in services:
+        await service.acquire()
+    assert len({service.worker_id for service in services}) == 8
+    assert {worker_of(s.generator.next_id()) for s in services} == {s.worker_id for s in services}
+
+async def test_expired_id_is_reused_and_old_owner_stops(leases):
+    old = WorkerIdService(SnowflakeGenerator(), ttl=60)
+    await old.acquire()
+    async with SessionLocal() as db:
+        await db.execute(update(WorkerIdLease).values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+        await db.commit()
+
+    # Все остальные номера заняты - новый воркер получает истекший
+    async with SessionLocal() as db:
+        expires_at = datetime.utcnow() + timedelta(seconds=60)
+        db.add_all([
+            WorkerIdLease(worker_id=n, owner="other", expires_at=expires_at)
+            for n in range(1 << WORKER_BITS) if n != old.worker_id
+        ])
+        await db.commit()
+    new = WorkerIdService(SnowflakeGenerator(), ttl=60)
+    await new.acquire()
+    assert new.worker_id == old.worker_id
+    assert not await old.renew()
+
+    with pytest.raises(RuntimeError):
+        await WorkerIdService(SnowflakeGenerator(), ttl=60).acquire()
+
+def test_unassigned_generator_refuses_ids():
+    with pytest.raises(RuntimeError):
+        SnowflakeGenerator().next_id()
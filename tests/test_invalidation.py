@@ -0,0 +1,63 @@
+import asyncio
+import pytest
+from coffeeapp.core.broker import MemoryBroker
+from coffeeapp.core.invalidation import CacheInvalidation
+
+pytestmark = pytest.mark.anyio
+
+async def test_invalidation_reaches_other_workers():
+    broker = MemoryBroker()
+    workers = [CacheInvalidation(broker) for _ in range(3)]
+    calls = {index: [] for index in range(len(workers))}
+    for index, worker in enumerate(workers):
+        worker.register("menu", calls[index].append)
+        await worker.start()
+    try:
+        await workers[0].publish("menu", "key")
+        for _ in range(10):
+            await asyncio.sleep(0)
+        # Инициатор сбрасывает кэш сразу и не обрабатывает свое событие повторно
+        assert calls == {0: ["key"], 1: ["key"], 2: ["key"]}
+    finally:
+        for worker in workers:
+            await worker.close()
+
+async def test_publish_error_keeps_local_reset():
+    class BrokenBroker(MemoryBroker):
+        async def publish(self, channel, message):
+            raise ConnectionError("broker is down")
+
+    worker = CacheInvalidation(BrokenBroker())
+    calls = []
+    worker.register("menu", calls.append)
+    await worker.publish("menu")
+    assert calls == [""]
+
+async def test_principal_invalidation_is_broadcast(monkeypatch):
+    from coffeeapp.core import dependencies
+    from coffeeapp.core.invalidation import cache_invalidation
+
+    published = []
+
+    async def publish(channel, message):
+        published.append(channel)
+
+    monkeypatch.setattr(cache_invalidation.broker, "publish", publish)
+    dependencies.principal_cache.set("someone@example.com", {"id": 1})
+    await dependencies.invalidate_principal("someone@example.com")
+    assert dependencies.principal_cache.get("someone@example.com") is None
+    assert published == ["principal"]
+
+async def test_principal_cache_stats_endpoint(api, make_user, auth_headers):
+    from coffeeapp.models.user import UserRole
+
+    response = await api.get("/auth/principal-cache/stats", headers=auth_headers(await make_user()))
+    assert response.status_code == 403
+
+    headers = auth_headers(await make_user(UserRole.ADMIN))
+    before = (await api.get("/auth/principal-cache/stats", headers=headers)).json()
+    after = (await api.get("/auth/principal-cache/stats", headers=headers)).json()
+    # Первый запрос админа загружает пользователя из БД, второй берет его из кэша
+    assert before["misses"] >= 1
+    assert after["hits"] == before["hits"] + 1
+    assert after["misses"] == before["misses"]
@@ -0,0 +1,90 @@
+import pytest
+from coffeeapp.core import menu_cache
+from coffeeapp.core.menu_cache import MenuVersion, invalidate_menu
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+async def menu(api, monkeypatch):
+    """Версия меню загружена из БД, как при запуске воркера"""
+    version = MenuVersion()
+    await version.load()
+    monkeypatch.setattr(menu_cache, "menu_version", version)
+    menu_cache.menu_cache.clear()
+    return api
+
+async def restart_worker(monkeypatch):
+    """Новый воркер: пустой кэш и версия, прочитанная из БД"""
+    version = MenuVersion()
+    await version.load()
+    monkeypatch.setattr(menu_cache, "menu_version", version)
+    menu_cache.menu_cache.clear()
+
+async def test_validators_are_shared_by_workers(menu, monkeypatch):
+    first = await menu.get("/products/products")
+    await restart_worker(monkeypatch)
+    second = await menu.get("/products/products")
+    assert first.status_code == second.status_code == 200
+    assert first.headers["etag"] == second.headers["etag"]
+    assert first.headers["last-modified"] == second.headers["last-modified"]
+
+async def test_not_modified_without_cache_or_db(menu, count_statements):
+    etag = (await menu.get("/categories/categories")).headers["etag"]
+    # Запись кэша истекла
+    menu_cache.menu_cache.clear()
+    with count_statements() as statements:
+        response = await menu.get("/categories/categories", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert statements == []
+
+async def test_if_modified_since(menu):
+    last_modified = (await menu.get("/products/products")).headers["last-modified"]
+    response = await menu.get("/products/products", headers={"If-Modified-Since": last_modified})
+    assert response.status_code == 304
+    response = await menu.get("/products/products", headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"})
+    assert response.status_code == 200
+    # If-None-Match важнее If-Modified-Since
+    response = await menu.get(
+        "/products/products", headers={"If-None-Match": '"other"', "If-Modified-Since": last_modified}
+    )
+    assert response.status_code == 200
+
+async def test_menu_change_replaces_validators(menu, monkeypatch):
+    etag = (await menu.get("/products/products")).headers["etag"]
+    await invalidate_menu()
+    response = await menu.get("/products/products", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    # Перезапущенный воркер видит ту же новую версию
+    await restart_worker(monkeypatch)
+    assert (await menu.get("/products/products")).headers["etag"] == response.headers["etag"]
+
+async def test_menu_change_uses_one_connection(menu, make_user, auth_headers):
+    from sqlalchemy import event
+    from coffeeapp.db.session import engine
+    from coffeeapp.models.user import UserRole
+
+    headers = auth_headers(await make_user(UserRole.ADMIN))
+    # Запрос не должен занимать второе соединение: при параллельных изменениях меню
+    # все соединения пула ждали бы друг друга до таймаута
+    checked_out, peak = 0, 0
+
+    def checkout(*args):
+        nonlocal checked_out, peak
+        checked_out += 1
+        peak = max(peak, checked_out)
+
+    def checkin(*args):
+        nonlocal checked_out
+        checked_out -= 1
+
+    event.listen(engine.sync_engine.pool, "checkout", checkout)
+    event.listen(engine.sync_engine.pool, "checkin", checkin)
+    try:
+        response = await menu.post("/categories/category", json={"name": "Seasonal"}, headers=headers)
+    finally:
+        event.remove(engine.sync_engine.pool, "checkout", checkout)
+        event.remove(engine.sync_engine.pool, "checkin", checkin)
+    assert response.status_code == 200
+    assert peak == 1
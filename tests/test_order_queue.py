@@ -0,0 +1,54 @@
+import json
+import pytest
+from sqlalchemy import delete
+from coffeeapp.core.order_queue import ActiveOrderQueue
+from coffeeapp.db.session import SessionLocal
+from coffeeapp.models.order import Order, OrderStatus
+from coffeeapp.models.user import UserRole
+
+pytestmark = pytest.mark.anyio
+
+def order_event(order_id: int, status: str) -> str:
+    return json.dumps({"type": "order_status", "order": {
+        "id": order_id, "user_id": 1, "status": status, "total_amount": 1.0,
+        "created_at": "2026-01-01T00:00:00", "items": []
+    }})
+
+async def test_events_during_rebuild_are_not_lost(make_user, monkeypatch):
+    user = await make_user()
+    async with SessionLocal() as db:
+        await db.execute(delete(Order))
+        db.add(Order(user_id=user.id, status=OrderStatus.PENDING))
+        await db.commit()
+
+    queue = ActiveOrderQueue()
+
+    class SessionWithEvent:
+        """Событие другого воркера приходит, пока загрузка ждет БД"""
+        def __init__(self):
+            self.session = SessionLocal()
+
+        async def __aenter__(self):
+            queue.apply_event(order_event(10**6, "pending"))
+            return await self.session.__aenter__()
+
+        async def __aexit__(self, *exc):
+            return await self.session.__aexit__(*exc)
+
+    monkeypatch.setattr("coffeeapp.core.order_queue.SessionLocal", SessionWithEvent)
+    await queue.rebuild()
+    ids = [order["id"] for order in json.loads(queue.body())]
+    assert len(ids) == 2 and 10**6 in ids
+
+async def test_queue_endpoint_serves_the_index(api, make_user, auth_headers, monkeypatch):
+    queue = ActiveOrderQueue()
+    monkeypatch.setattr("coffeeapp.api.v1.endpoints.orders.order_queue", queue)
+    queue.apply_event(order_event(2, "preparing"))
+    queue.apply_event(order_event(1, "pending"))
+    queue.apply_event(order_event(3, "ready"))
+    admin = await make_user(UserRole.ADMIN)
+
+    response = await api.get("/orders/queue", headers=auth_headers(admin))
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert [order["id"] for order in response.json()] == [1, 2]
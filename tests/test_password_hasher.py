@@ -0,0 +1,42 @@
+import asyncio
+import threading
+import pytest
+from coffeeapp.core.security import PasswordHasher
+from coffeeapp.models.user import UserRole
+
+pytestmark = pytest.mark.anyio
+
+async def test_stats_report_queue_depth():
+    hasher = PasswordHasher(workers=1)
+    release = threading.Event()
+    try:
+        tasks = [asyncio.create_task(hasher._run(release.wait)) for _ in range(3)]
+        for _ in range(10):
+            await asyncio.sleep(0)
+        # Один запрос в пуле, два ждут свободного воркера
+        assert hasher.stats() == {"workers": 1, "executor": "thread", "in_progress": 1, "queue_depth": 2}
+        release.set()
+        await asyncio.gather(*tasks)
+        assert hasher.stats()["in_progress"] == hasher.stats()["queue_depth"] == 0
+    finally:
+        release.set()
+        hasher.shutdown()
+
+async def test_shutdown_resets_semaphore():
+    hasher = PasswordHasher(workers=1)
+    assert await hasher.hash("secret")
+    hasher.shutdown()
+    # Следующий запуск (новый event loop) получает свежий семафор
+    assert hasher._semaphore is None
+    assert await hasher.hash("secret")
+    hasher.shutdown()
+
+async def test_stats_endpoint_is_admin_only(api, make_user, auth_headers):
+    response = await api.get("/auth/password-hasher/stats", headers=auth_headers(await make_user()))
+    assert response.status_code == 403
+
+    response = await api.get(
+        "/auth/password-hasher/stats", headers=auth_headers(await make_user(UserRole.ADMIN))
+    )
+    assert response.status_code == 200
+    assert set(response.json()) == {"workers", "executor", "in_progress", "queue_depth"}
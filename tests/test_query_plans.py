@@ -0,0 +1,106 @@
+"""
+Планы горячих запросов: каждый должен идти по своему индексу, без полного
+сканирования таблицы. Запросы выполняются кодом приложения, EXPLAIN получает
+тот же SQL с теми же параметрами (фикстура query_plans).
+"""
+import re
+import pytest
+from starlette.requests import Request
+from coffeeapp.api.v1.endpoints.chat import get_chat_history, support_room, user_room
+from coffeeapp.api.v1.endpoints.orders import get_orders
+from coffeeapp.api.v1.endpoints.products import get_products
+from coffeeapp.core.menu_cache import invalidate_menu
+from coffeeapp.core.order_queue import active_orders_query
+from coffeeapp.core.task_queue import TaskWorkerPool
+from coffeeapp.db.session import SessionLocal, engine
+from coffeeapp.models.order import Order
+from coffeeapp.models.user import UserRole
+from coffeeapp.tasks.cleanup import cleanup_unverified_users
+
+pytestmark = pytest.mark.anyio
+
+POSTGRESQL = engine.dialect.name == "postgresql"
+
+def plan_for(plans, statement: str) -> str:
+    """План первого запроса, начинающегося с statement (например, "FROM orders")"""
+    for sql, plan in plans:
+        if statement in " ".join(sql.split()):
+            return plan
+    raise AssertionError(f"no query with {statement!r} among {[sql for sql, _ in plans]}")
+
+def assert_index_scan(plan: str, table: str, index: str):
+    assert index in plan, plan
+    full_scan = rf"Seq Scan on {table}\b" if POSTGRESQL else rf"^SCAN {table}$"
+    assert not re.search(full_scan, plan, re.MULTILINE), plan
+
+def products_request(**filters):
+    params = dict(
+        skip=0, limit=10, cursor=None, search=None, search_description=False,
+        category_id=None, min_price=None, max_price=None, sort_by=None
+    )
+    params.update(filters)
+    return params
+
+async def test_products_by_category(query_plans):
+    await invalidate_menu()
+    async with SessionLocal() as db:
+        await get_products(Request({"type": "http", "headers": []}), db, **products_request(
+            category_id=1, sort_by="price"
+        ))
+    plan = plan_for(query_plans, "FROM products WHERE products.category_id")
+    assert_index_scan(plan, "products", "ix_products_category_price")
+
+@pytest.mark.parametrize("search_description", [False, True])
+async def test_product_search(query_plans, search_description):
+    await invalidate_menu()
+    async with SessionLocal() as db:
+        await get_products(Request({"type": "http", "headers": []}), db, **products_request(
+            search="lat moc", search_description=search_description
+        ))
+    plan = plan_for(query_plans, "FROM products")
+    if POSTGRESQL:
+        index = "ix_products_document" if search_description else "ix_products_name_trgm"
+        assert_index_scan(plan, "products", index)
+    else:
+        assert "products_fts VIRTUAL TABLE INDEX" in plan, plan
+        assert_index_scan(plan, "products", "PRIMARY KEY")
+
+async def test_user_orders_with_items(query_plans, make_user):
+    user = await make_user()
+    async with SessionLocal() as db:
+        db.add(Order(user_id=user.id))
+        await db.commit()
+        await get_orders(db, user, skip=0, limit=10, cursor=None)
+    assert_index_scan(plan_for(query_plans, "FROM orders WHERE"), "orders", "ix_orders_user_created")
+    assert_index_scan(
+        plan_for(query_plans, "FROM order_items WHERE"), "order_items", "ix_order_items_order_id"
+    )
+
+async def test_active_orders_use_partial_index(query_plans):
+    async with SessionLocal() as db:
+        await db.scalars(active_orders_query())
+    plan = plan_for(query_plans, "FROM orders")
+    assert_index_scan(plan, "orders", "ix_orders_active_created")
+    assert "TEMP B-TREE" not in plan and "Sort" not in plan
+
+async def test_chat_history(query_plans, make_user):
+    customer = await make_user()
+    admin = await make_user(UserRole.ADMIN)
+    async with SessionLocal() as db:
+        await get_chat_history(support_room(customer.id), 50, None, db, admin)
+        await get_chat_history(user_room(customer.id), 50, None, db, admin)
+    room_plan, personal_plan = [plan for sql, plan in query_plans if "FROM chat_messages" in sql]
+    assert_index_scan(room_plan, "chat_messages", "ix_chat_messages_room_id")
+    # Личная комната: сообщения комнаты или отправленные личные - по двум индексам
+    assert_index_scan(personal_plan, "chat_messages", "ix_chat_messages_room_id")
+    assert_index_scan(personal_plan, "chat_messages", "ix_chat_messages_sender_id")
+
+async def test_unverified_cleanup(query_plans):
+    await cleanup_unverified_users()
+    plan = plan_for(query_plans, "FROM users WHERE users.is_verified")
+    assert_index_scan(plan, "users", "ix_users_unverified_expires")
+
+async def test_task_claim(query_plans):
+    await TaskWorkerPool(workers=1, poll_interval=1, lock_timeout=60)._claim()
+    plan = plan_for(query_plans, "UPDATE background_tasks")
+    assert_index_scan(plan, "background_tasks", "ix_background_tasks_status_run_at")
@@ -0,0 +1,32 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import pytest
+from coffeeapp.core.scheduler import setup_scheduler
+
+pytestmark = pytest.mark.anyio
+
+async def test_long_missed_runs_execute_once():
+    # Ежедневная задача, воркеры лежали двое суток: последний пропущенный запуск был
+    # два часа назад - он не отбрасывается, а все пропущенные сливаются в один
+    calls = []
+
+    async def job():
+        calls.append(datetime.now(timezone.utc))
+
+    scheduler = setup_scheduler()
+    scheduler.start(paused=True)
+    try:
+        scheduler.add_job(
+            job, "interval", days=1, id="job",
+            next_run_time=datetime.now(timezone.utc) - timedelta(days=2, hours=2)
+        )
+        scheduler.resume()
+        for _ in range(50):
+            await asyncio.sleep(0.01)
+            if calls:
+                break
+        await asyncio.sleep(0.05)
+        assert len(calls) == 1
+        assert scheduler.get_job("job").next_run_time > datetime.now(timezone.utc)
+    finally:
+        scheduler.shutdown(wait=False)
@@ -0,0 +1,43 @@
+import uuid
+import pytest
+from sqlalchemy import select
+from coffeeapp.db.search import search_products
+from coffeeapp.db.session import SessionLocal
+from coffeeapp.models.category import Category
+from coffeeapp.models.product import Product
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+async def products(database):
+    """Продукты с уникальным суффиксом, чтобы не пересекаться с данными других тестов"""
+    tag = uuid.uuid4().hex[:8]
+    names = {
+        "latte_mocha": f"Latte Mocha {tag}",
+        "mocha": f"Mocha {tag}",
+        "chocolate": f"Chocolate {tag}",
+    }
+    async with SessionLocal() as db:
+        category = Category(name=f"Search {tag}")
+        db.add(category)
+        await db.flush()
+        rows = {key: Product(name=name, price=1, category_id=category.id) for key, name in names.items()}
+        db.add_all(rows.values())
+        await db.commit()
+        return tag, {key: row.id for key, row in rows.items()}
+
+async def found(search: str, ids) -> set:
+    query, _ = search_products(select(Product.id).filter(Product.id.in_(ids)), search)
+    async with SessionLocal() as db:
+        return set((await db.scalars(query)).all())
+
+@pytest.mark.parametrize("search, expected", [
+    ("lat moc", {"latte_mocha"}),
+    ("MOC lat", {"latte_mocha"}),
+    ("moc", {"latte_mocha", "mocha"}),
+    # Совпадение с началом слова, а не с любой подстрокой
+    ("ate", set()),
+])
+async def test_name_search_matches_word_prefixes(products, search, expected):
+    tag, ids = products
+    assert await found(f"{search} {tag}", list(ids.values())) == {ids[key] for key in expected}
@@ -0,0 +1,101 @@
+"""
+Число SQL-запросов на запрос к API не должно зависеть от числа строк:
+каждая проверка выполняет запрос на маленьких и больших данных (N+1).
+"""
+import uuid
+import pytest
+from coffeeapp.db.session import SessionLocal
+from coffeeapp.models.category import Category
+from coffeeapp.models.order import Order, OrderItem
+from coffeeapp.models.product import Product
+from coffeeapp.models.user import UserRole
+
+pytestmark = pytest.mark.anyio
+
+SIZES = (1, 6)
+
+@pytest.fixture
+async def products(database):
+    async with SessionLocal() as db:
+        category = Category(name=uuid.uuid4().hex)
+        db.add(category)
+        await db.flush()
+        items = [Product(name=f"p{i}", price=1.0 + i, category_id=category.id) for i in range(max(SIZES))]
+        db.add_all(items)
+        await db.commit()
+        return items
+
+async def add_orders(user, products, count: int, items_per_order: int = 2):
+    async with SessionLocal() as db:
+        for _ in range(count):
+            order = Order(user_id=user.id, total_amount=1.0)
+            order.items = [
+                OrderItem(product_id=product.id, quantity=1, price=product.price)
+                for product in products[:items_per_order]
+            ]
+            db.add(order)
+        await db.commit()
+        return order.id
+
+async def fill_cart(api, headers, products, count: int):
+    for product in products[:count]:
+        response = await api.post("/cart", json={"product_id": product.id, "quantity": 1}, headers=headers)
+        assert response.status_code == 200
+
+async def statements_per_request(count_statements, send) -> int:
+    with count_statements() as statements:
+        response = await send()
+    assert response.status_code == 200, response.text
+    return len(statements)
+
+async def test_order_list(api, make_user, products, count_statements, auth_headers):
+    counts = []
+    for size in SIZES:
+        user = await make_user()
+        await add_orders(user, products, size)
+        counts.append(await statements_per_request(
+            count_statements, lambda: api.get("/orders/orders", headers=auth_headers(user))
+        ))
+    assert counts[0] == counts[1]
+
+async def test_single_order_and_status_change(api, make_user, products, count_statements, auth_headers):
+    admin = await make_user(UserRole.ADMIN)
+    reads, updates = [], []
+    for size in SIZES:
+        user = await make_user()
+        order_id = await add_orders(user, products, 1, items_per_order=size)
+        reads.append(await statements_per_request(
+            count_statements, lambda: api.get(f"/orders/{order_id}", headers=auth_headers(user))
+        ))
+        updates.append(await statements_per_request(
+            count_statements,
+            lambda: api.patch(f"/orders/order/{order_id}?status=ready", headers=auth_headers(admin))
+        ))
+    assert reads[0] == reads[1]
+    assert updates[0] == updates[1]
+
+async def test_cart_and_checkout(api, make_user, products, count_statements, auth_headers):
+    reads, checkouts = [], []
+    for size in SIZES:
+        user = await make_user()
+        headers = auth_headers(user)
+        await fill_cart(api, headers, products, size)
+        reads.append(await statements_per_request(
+            count_statements, lambda: api.get("/cart", headers=auth_headers(user))
+        ))
+        checkouts.append(await statements_per_request(
+            count_statements, lambda: api.post("/orders/", headers=auth_headers(user))
+        ))
+    assert reads[0] == reads[1]
+    assert checkouts[0] == checkouts[1]
+
+async def test_user_list(api, make_user, count_statements, auth_headers):
+    admin = await make_user(UserRole.ADMIN)
+    counts = []
+    for _ in SIZES:
+        counts.append(await statements_per_request(
+            count_statements, lambda: api.get("/auth/users", headers=auth_headers(admin))
+        ))
+        for _ in range(5):
+            await make_user()
+    assert counts[0] == counts[1]
@@ -0,0 +1,36 @@
+import pytest
+from sqlalchemy import delete
+from coffeeapp.core.task_queue import TASK_HANDLERS, TaskWorkerPool, enqueue, task
+from coffeeapp.db.session import SessionLocal
+from coffeeapp.models.task import BackgroundTask, TaskStatus
+
+pytestmark = pytest.mark.anyio
+
+@task("test_missing_key")
+async def missing_key(payload: dict):
+    return payload["email"]
+
+async def run_once(name: str) -> BackgroundTask:
+    """Постановка задачи и одно выполнение без фоновых воркеров"""
+    async with SessionLocal() as db:
+        # Задачи других тестов (например, чеки заказов) не должны попасть в захват
+        await db.execute(delete(BackgroundTask))
+        await enqueue(db, name, {}, max_attempts=3)
+        await db.commit()
+    pool = TaskWorkerPool(workers=1, poll_interval=1, lock_timeout=60)
+    row = await pool._claim()
+    assert row.name == name
+    await pool._execute(row)
+    async with SessionLocal() as db:
+        return await db.get(BackgroundTask, row.id)
+
+async def test_handler_key_error_is_retried(database):
+    result = await run_once("test_missing_key")
+    assert result.status == TaskStatus.PENDING
+    assert "KeyError" in result.last_error
+
+async def test_unknown_task_fails_without_retry(database):
+    assert "test_not_registered" not in TASK_HANDLERS
+    result = await run_once("test_not_registered")
+    assert result.status == TaskStatus.FAILED
+    assert "UnknownTaskError" in result.last_error